@@ -94,35 +94,65 @@ function clientSideRecommend(text) {
 }
 
 // ── ML API call ───────────────────────────────────────────────────────────────
-async function mlRecommend(text) {
-  const res = await fetch(`${ML_API_URL}/recommend`, {
+// One id per open chat, so follow-ups ("make it ladies only") keep earlier constraints
+function newSessionId() {
+  return globalThis.crypto?.randomUUID?.() ?? `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+}
+
+// Map an ML result to the same shape the UI uses (match by name in static data for id/image)
+function toUiHostel(r) {
+  const staticMatch = hostels.find(
+    (h) => h.name.toLowerCase() === r.name.toLowerCase()
+  );
+  return {
+    id: staticMatch?.id ?? null,
+    name: r.name,
+    hostelType: r.hostelType,
+    distance: r.distance,
+    price: r.price,
+    rating: r.rating,
+    safetyScore: r.safetyScore,
+    matchScore: r.matchScore,
+    image: staticMatch?.image,
+  };
+}
+
+// /recommend/stream sends NDJSON events: "understood", one "result" per hostel, "done".
+// onUpdate gets the reply so far after every event, so hostels render as they arrive.
+async function mlRecommendStream(text, sessionId, onUpdate) {
+  const res = await fetch(`${ML_API_URL}/recommend/stream`, {
     method: 'POST',
     headers: { 'Content-Type': 'application/json' },
-    body: JSON.stringify({ text, k: 5 }),
+    body: JSON.stringify({ text, k: 5, sessionId }),
     signal: AbortSignal.timeout(5000),
   });
-  if (!res.ok) throw new Error('ML API error');
-  const data = await res.json();
-
-  // Map ML results to the same shape the UI uses (match by name in static data for id/image)
-  const results = data.results.map((r) => {
-    const staticMatch = hostels.find(
-      (h) => h.name.toLowerCase() === r.name.toLowerCase()
-    );
-    return {
-      id: staticMatch?.id ?? null,
-      name: r.name,
-      hostelType: r.hostelType,
-      distance: r.distance,
-      price: r.price,
-      rating: r.rating,
-      safetyScore: r.safetyScore,
-      matchScore: r.matchScore,
-      image: staticMatch?.image,
-    };
-  });
+  if (!res.ok || !res.body) throw new Error('ML API error');
 
-  return { understood: data.understood, results, mlPowered: true };
+  const reader = res.body.pipeThrough(new TextDecoderStream()).getReader();
+  let buffer = '';
+  let result = null;
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += value;
+    const lines = buffer.split('\n');
+    buffer = lines.pop();
+    for (const line of lines) {
+      if (!line.trim()) continue;
+      const event = JSON.parse(line);
+      if (event.event === 'error') throw new Error(event.detail);
+      if (event.event === 'understood') {
+        result = { understood: event.understood, results: [], mlPowered: true };
+      } else if (event.event === 'result' && result) {
+        result = { ...result, results: [...result.results, toUiHostel(event.hostel)] };
+      } else {
+        continue;
+      }
+      onUpdate(result);
+    }
+  }
+  if (!result) throw new Error('ML API error');
+  return result;
 }
 
 // ── Suggestions ───────────────────────────────────────────────────────────────
@@ -146,6 +176,7 @@ export default function AiChat() {
   const [input, setInput] = useState('');
   const [isTyping, setIsTyping] = useState(false);
   const chatEndRef = useRef(null);
+  const sessionIdRef = useRef(newSessionId());
   const navigate = useNavigate();
 
   // Check ML availability on first open
@@ -169,11 +200,23 @@ export default function AiChat() {
     setInput('');
     setIsTyping(true);
 
+    // Streamed replies are updated in place, found by this id
+    const replyId = `reply-${Date.now()}`;
+    const showReply = (result) => {
+      const reply = { id: replyId, role: 'assistant', text: result.understood, results: result.results, mlPowered: result.mlPowered };
+      setMessages((prev) => (prev.some((m) => m.id === replyId)
+        ? prev.map((m) => (m.id === replyId ? reply : m))
+        : [...prev, reply]));
+    };
+
     try {
       let result;
       if (mlAvailable) {
         try {
-          result = await mlRecommend(text);
+          result = await mlRecommendStream(text, sessionIdRef.current, (partial) => {
+            setIsTyping(false);
+            showReply(partial);
+          });
         } catch {
           // ML server failed mid-session — fall back silently
           setMlAvailable(false);
@@ -185,10 +228,7 @@ export default function AiChat() {
         result = clientSideRecommend(text);
       }
 
-      setMessages((prev) => [
-        ...prev,
-        { role: 'assistant', text: result.understood, results: result.results, mlPowered: result.mlPowered },
-      ]);
+      showReply(result);
     } catch (err) {
       setMessages((prev) => [
         ...prev,
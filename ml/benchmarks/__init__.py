@@ -0,0 +1,11 @@
+"""
+Havenly ML benchmarks
+=====================
+Throughput and accuracy harnesses for the ML service. Run them from the
+ml/ directory, e.g.:
+
+    python -m benchmarks.bench_extraction
+    python -m benchmarks.bench_recommender --sizes 1000,10000,100000
+
+benchmarks.synthetic generates seeded catalogs and chat queries for load tests.
+"""
@@ -0,0 +1,226 @@
+"""
+Extraction Benchmark & Golden-Corpus Regression Check
+=====================================================
+Runs EnhancedPreferenceExtractor over a labelled corpus and reports:
+
+- throughput (queries/sec) and p50/p99 latency of extract_and_validate()
+- time spent in each extraction stage (extract_distance, extract_score, ...)
+- field-level accuracy against the labels, overall and per category
+
+Corpus format (JSONL, one query per line):
+    {"category": "rent_range", "text": "rent between 3000 and 5000",
+     "expected": {"rent_min": 3000.0, "rent_max": 5000.0, ...}}
+Only the fields listed under "expected" are checked; a null value means the
+field must be absent or None (e.g. no hostel_type for a gender-neutral query).
+
+Usage (from the ml/ directory):
+    python -m benchmarks.bench_extraction
+    python -m benchmarks.bench_extraction --repeat 50 --json results.json
+    python -m benchmarks.bench_extraction --min-accuracy 0.95 --show-failures
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from enhanced_preference_extraction import EnhancedPreferenceExtractor
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(__file__), 'data', 'extraction_corpus.jsonl')
+
+# Extraction stages timed individually, in pipeline order
+STAGES = [
+    'preprocess', 'scan', 'extract_distance', 'extract_rent_range', 'extract_rent',
+    'extract_score', 'extract_amenities', 'extract_hostel_type', 'validate_preferences',
+]
+
+
+def load_corpus(path: str) -> List[dict]:
+    """Read the labelled JSONL corpus"""
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def values_match(actual, expected) -> bool:
+    """Compare an extracted value with its label (floats with a small tolerance)"""
+    if expected is None or actual is None:
+        return actual is None and expected is None
+    if isinstance(expected, (int, float)) and isinstance(actual, (int, float)):
+        return abs(actual - expected) <= 1e-6
+    return actual == expected
+
+
+def measure_accuracy(extractor: EnhancedPreferenceExtractor, corpus: List[dict]) -> dict:
+    """Field-level accuracy of the extractor against the corpus labels"""
+    by_field = defaultdict(lambda: [0, 0])     # field -> [correct, total]
+    by_category = defaultdict(lambda: [0, 0])
+    failures = []
+
+    for item in corpus:
+        prefs, _ = extractor.extract_and_validate(item['text'])
+        for field, expected in item['expected'].items():
+            actual = prefs.get(field)
+            ok = values_match(actual, expected)
+            for bucket in (by_field[field], by_category[item.get('category', 'uncategorized')]):
+                bucket[0] += ok
+                bucket[1] += 1
+            if not ok:
+                failures.append({'text': item['text'], 'field': field,
+                                 'expected': expected, 'actual': actual})
+
+    correct = sum(c for c, _ in by_field.values())
+    total = sum(t for _, t in by_field.values())
+
+    def summarize(buckets):
+        return {name: {'correct': c, 'total': t, 'accuracy': round(c / t, 4)}
+                for name, (c, t) in sorted(buckets.items())}
+
+    return {
+        'accuracy': round(correct / total, 4) if total else 1.0,
+        'correct': correct,
+        'total': total,
+        'by_field': summarize(by_field),
+        'by_category': summarize(by_category),
+        'failures': failures,
+    }
+
+
+def measure_latency(extractor: EnhancedPreferenceExtractor, texts: List[str], repeat: int) -> dict:
+    """Per-call latency and throughput of extract_and_validate()"""
+    for text in texts:                          # warm-up
+        extractor.extract_and_validate(text)
+
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            t0 = time.perf_counter()
+            extractor.extract_and_validate(text)
+            latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'calls': len(latencies),
+        'seconds': round(elapsed, 4),
+        'qps': round(len(latencies) / elapsed, 1),
+        'p50_us': round(latencies[len(latencies) // 2] * 1e6, 1),
+        'p99_us': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1e6, 1),
+        'mean_us': round(statistics.fmean(latencies) * 1e6, 1),
+    }
+
+
+def measure_stages(extractor: EnhancedPreferenceExtractor, texts: List[str], repeat: int) -> dict:
+    """
+    Time spent in each extraction stage.
+
+    Stages are wrapped on this extractor instance only, so the wrapper
+    overhead never shows up in measure_latency().
+    """
+    totals: Dict[str, float] = defaultdict(float)
+    calls: Dict[str, int] = defaultdict(int)
+
+    def timed(name, method):
+        def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                totals[name] += time.perf_counter() - t0
+                calls[name] += 1
+        return wrapper
+
+    for name in STAGES:
+        setattr(extractor, name, timed(name, getattr(extractor, name)))
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            extractor.extract_and_validate(text)
+    elapsed = time.perf_counter() - started
+
+    return {
+        name: {
+            'calls': calls[name],
+            'total_ms': round(totals[name] * 1e3, 3),
+            'per_call_us': round(totals[name] / calls[name] * 1e6, 2) if calls[name] else 0.0,
+            'share': round(totals[name] / elapsed, 4) if elapsed else 0.0,
+        }
+        for name in STAGES
+    }
+
+
+def run(corpus_path: str = DEFAULT_CORPUS, repeat: int = 20) -> dict:
+    """Run every measurement and return the combined report"""
+    corpus = load_corpus(corpus_path)
+    texts = [item['text'] for item in corpus]
+    return {
+        'corpus': os.path.relpath(corpus_path),
+        'queries': len(corpus),
+        'repeat': repeat,
+        'latency': measure_latency(EnhancedPreferenceExtractor(), texts, repeat),
+        'stages': measure_stages(EnhancedPreferenceExtractor(), texts, repeat),
+        'accuracy': measure_accuracy(EnhancedPreferenceExtractor(), corpus),
+    }
+
+
+def print_report(report: dict, show_failures: bool = False):
+    latency, accuracy = report['latency'], report['accuracy']
+
+    print("=" * 80)
+    print(f"EXTRACTION BENCHMARK — {report['queries']} queries x {report['repeat']} ({report['corpus']})")
+    print("=" * 80)
+    print(f"\nThroughput: {latency['qps']:.0f} queries/sec")
+    print(f"Latency:    p50 {latency['p50_us']:.1f} us   p99 {latency['p99_us']:.1f} us   "
+          f"mean {latency['mean_us']:.1f} us")
+
+    print("\nStage breakdown:")
+    for name, stage in report['stages'].items():
+        print(f"  {name:<22} {stage['total_ms']:>9.2f} ms  {stage['calls']:>7} calls  "
+              f"{stage['per_call_us']:>7.2f} us/call  {stage['share']:>6.1%}")
+
+    print(f"\nAccuracy: {accuracy['accuracy']:.1%} ({accuracy['correct']}/{accuracy['total']} fields)")
+    for title, key in (("By field", 'by_field'), ("By category", 'by_category')):
+        print(f"\n{title}:")
+        for name, row in accuracy[key].items():
+            print(f"  {name:<22} {row['accuracy']:>6.1%}  ({row['correct']}/{row['total']})")
+
+    if show_failures and accuracy['failures']:
+        print("\nFailures:")
+        for failure in accuracy['failures']:
+            print(f"  - {failure['text']!r}: {failure['field']} expected "
+                  f"{failure['expected']!r}, got {failure['actual']!r}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the preference extractor on a labelled corpus")
+    parser.add_argument('--corpus', default=DEFAULT_CORPUS, help="labelled JSONL corpus")
+    parser.add_argument('--repeat', type=int, default=20, help="timing passes over the corpus")
+    parser.add_argument('--json', metavar='PATH', help="also write the full report as JSON")
+    parser.add_argument('--min-accuracy', type=float,
+                        help="exit with status 1 if field accuracy drops below this (0-1)")
+    parser.add_argument('--show-failures', action='store_true', help="list every mismatched field")
+    args = parser.parse_args(argv)
+
+    report = run(args.corpus, args.repeat)
+    print_report(report, show_failures=args.show_failures)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, default=str)
+        print(f"\n[OK] Report written to {args.json}")
+
+    if args.min_accuracy is not None and report['accuracy']['accuracy'] < args.min_accuracy:
+        print(f"\n[WARN] Accuracy {report['accuracy']['accuracy']:.1%} is below "
+              f"the required {args.min_accuracy:.1%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,228 @@
+"""
+Recommender Scaling Benchmark
+=============================
+Fits HostelRecommender on synthetic catalogs of increasing size (see
+benchmarks/synthetic.py) and reports, per catalog size:
+
+- fit time of preprocess_data() and prepare_features()
+- p50/p99 latency of single-query recommend()
+- throughput of recommend_many() over the whole query set
+- peak resident memory of the process that did the work
+
+Every size runs in a fresh child process, so peak RSS belongs to that size
+alone and one size's caches never warm another's. The JSON report is meant
+to be committed or archived per release and compared with --compare.
+
+Usage (from the ml/ directory):
+    python -m benchmarks.bench_recommender
+    python -m benchmarks.bench_recommender --sizes 1000,10000,100000,1000000 --json bench.json
+    python -m benchmarks.bench_recommender --index kd_tree --compare bench.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+try:  # peak RSS; unavailable on Windows
+    import resource
+except ImportError:
+    resource = None
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from knn_hostel_model import HostelRecommender
+from benchmarks.synthetic import generate_catalog, generate_queries
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+
+# Metrics shown by --compare: (section, key, True if higher is better)
+COMPARED = [
+    ('fit', 'preprocess_s', False),
+    ('fit', 'prepare_features_s', False),
+    ('query', 'p50_ms', False),
+    ('query', 'p99_ms', False),
+    ('batch', 'qps', True),
+    (None, 'peak_rss_mb', False),
+]
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process so far"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return round(peak / (1 << 20 if sys.platform == 'darwin' else 1 << 10), 1)
+
+
+def measure_size(size: int, queries: List[dict], k: int, index: str, seed: int,
+                 missing_rate: Optional[float], warmup: int) -> dict:
+    """Generate, fit and query one catalog size; runs in its own process"""
+    t0 = time.perf_counter()
+    catalog = generate_catalog(size, seed=seed, missing_rate=missing_rate)
+    generate_s = time.perf_counter() - t0
+
+    recommender = HostelRecommender(index=index)
+    recommender.df = catalog
+    with contextlib.redirect_stdout(io.StringIO()):     # silence the [OK] progress lines
+        t0 = time.perf_counter()
+        recommender.preprocess_data()
+        preprocess_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        recommender.prepare_features()
+        prepare_s = time.perf_counter() - t0
+
+    for prefs in queries[:warmup]:
+        recommender.recommend(dict(prefs), k=k, show_details=False)
+
+    latencies = []
+    for prefs in queries:
+        t0 = time.perf_counter()
+        recommender.recommend(dict(prefs), k=k, show_details=False)
+        latencies.append(time.perf_counter() - t0)
+    latencies.sort()
+
+    t0 = time.perf_counter()
+    recommender.recommend_many([dict(prefs) for prefs in queries], k=k)
+    batch_s = time.perf_counter() - t0
+
+    return {
+        'size': size,
+        'generate_s': round(generate_s, 4),
+        'fit': {
+            'preprocess_s': round(preprocess_s, 4),
+            'prepare_features_s': round(prepare_s, 4),
+        },
+        'query': {
+            'calls': len(latencies),
+            'p50_ms': round(latencies[len(latencies) // 2] * 1e3, 3),
+            'p99_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1e3, 3),
+            'mean_ms': round(statistics.fmean(latencies) * 1e3, 3),
+        },
+        'batch': {
+            'queries': len(queries),
+            'seconds': round(batch_s, 4),
+            'qps': round(len(queries) / batch_s, 1),
+        },
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def run(sizes: List[int] = DEFAULT_SIZES, queries: int = 200, k: int = 5, index: str = 'exact',
+        seed: int = 0, missing_rate: Optional[float] = None, warmup: int = 20) -> dict:
+    """Benchmark every catalog size and return the combined report"""
+    query_set = generate_queries(queries, seed=seed)
+    prefs = [p for _, p in query_set]
+
+    results = []
+    context = multiprocessing.get_context('spawn')
+    for size in sizes:
+        print(f"[..] {size:,} hostels", flush=True)
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            results.append(pool.submit(measure_size, size, prefs, k, index, seed,
+                                       missing_rate, warmup).result())
+
+    return {
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'sklearn': sklearn.__version__,
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+        },
+        'config': {
+            'sizes': list(sizes),
+            'queries': queries,
+            'k': k,
+            'index': index,
+            'seed': seed,
+            'missing_rate': missing_rate,
+            'warmup': warmup,
+        },
+        'sample_queries': [text for text, _ in query_set[:10]],
+        'results': results,
+    }
+
+
+def print_report(report: dict):
+    config = report['config']
+    print("=" * 80)
+    print(f"RECOMMENDER BENCHMARK — index={config['index']}, k={config['k']}, "
+          f"{config['queries']} queries, seed {config['seed']}")
+    print("=" * 80)
+    print(f"\n{'hostels':>10} {'preprocess':>11} {'features':>10} {'p50':>9} {'p99':>9} "
+          f"{'batch q/s':>10} {'peak RSS':>10}")
+    for row in report['results']:
+        rss = f"{row['peak_rss_mb']:.0f} MB" if row['peak_rss_mb'] is not None else 'n/a'
+        print(f"{row['size']:>10,} {row['fit']['preprocess_s']:>10.3f}s "
+              f"{row['fit']['prepare_features_s']:>9.3f}s {row['query']['p50_ms']:>7.3f}ms "
+              f"{row['query']['p99_ms']:>7.3f}ms {row['batch']['qps']:>10.1f} {rss:>10}")
+
+
+def print_comparison(report: dict, baseline: dict):
+    """Ratio of every tracked metric against a previous report, per shared size"""
+    previous = {row['size']: row for row in baseline['results']}
+    print("\nCompared with baseline (new / old; '!' marks a >10% regression):")
+    for row in report['results']:
+        old = previous.get(row['size'])
+        if old is None:
+            continue
+        cells = []
+        for section, key, higher_is_better in COMPARED:
+            new_value = row[section][key] if section else row[key]
+            old_value = old[section][key] if section else old[key]
+            if not new_value or not old_value:
+                continue
+            ratio = new_value / old_value
+            worse = ratio < 0.9 if higher_is_better else ratio > 1.1
+            cells.append(f"{key} {ratio:.2f}x{'!' if worse else ''}")
+        print(f"  {row['size']:>10,}  " + "  ".join(cells))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark HostelRecommender on synthetic catalogs")
+    parser.add_argument('--sizes', default=",".join(str(s) for s in DEFAULT_SIZES),
+                        help="comma-separated catalog sizes")
+    parser.add_argument('--queries', type=int, default=200, help="queries per size")
+    parser.add_argument('-k', type=int, default=5, help="recommendations per query")
+    parser.add_argument('--index', default='exact', choices=['exact', 'kd_tree', 'ball_tree'],
+                        help="nearest-neighbour backend")
+    parser.add_argument('--seed', type=int, default=0, help="seed for catalogs and queries")
+    parser.add_argument('--missing-rate', type=float,
+                        help="extra fraction of numeric/amenity cells left blank")
+    parser.add_argument('--warmup', type=int, default=20, help="untimed queries before measuring")
+    parser.add_argument('--json', metavar='PATH', help="also write the full report as JSON")
+    parser.add_argument('--compare', metavar='PATH', help="previous JSON report to compare against")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    report = run(sizes, args.queries, args.k, args.index, args.seed, args.missing_rate, args.warmup)
+    print_report(report)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            print_comparison(report, json.load(f))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n[OK] Report written to {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
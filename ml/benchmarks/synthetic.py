@@ -0,0 +1,166 @@
+"""
+Synthetic Catalogs & Queries
+============================
+Seeded generators for load-testing HostelRecommender beyond the 114 real
+hostels.
+
+generate_catalog() bootstraps whole rows of the Excel catalog, so the
+synthetic data keeps its schema, the Hostel_Type mix, amenity prevalence,
+the correlations between columns (e.g. rent vs. type) and the observed
+missing-value rates. Float columns get a small jitter so large catalogs are
+not just repeated copies of the same 114 points; missing_rate optionally
+blanks extra numeric/amenity cells to exercise the KNN imputer.
+
+generate_queries() composes natural-language requests from the phrasings
+the chat UI sees and runs them through EnhancedPreferenceExtractor, so the
+preference dicts are exactly what /recommend would score.
+
+Usage (from the ml/ directory):
+    from benchmarks.synthetic import generate_catalog, generate_queries
+    df = generate_catalog(100_000, seed=7)
+    queries = generate_queries(500, seed=7)    # [(text, prefs), ...]
+"""
+
+import os
+import random
+import sys
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from enhanced_preference_extraction import EnhancedPreferenceExtractor
+from knn_hostel_model import HostelRecommender
+
+DEFAULT_SOURCE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                              'CUSAT_Private_Hostels_ML_Updated.xlsx')
+
+# Relative jitter (fraction of the column's std) applied to float columns
+JITTER = 0.05
+
+# Query fragments; each query picks at most one of every group
+HOSTEL_TYPES = ['', '', 'gents', 'ladies', 'mixed', 'boys', 'girls', "men's", "women's"]
+DISTANCES = ['', '', 'near cusat', 'within {km} km', 'less than {km} km from campus',
+             'walking distance']
+BUDGETS = ['', '', 'cheap', 'under {rent}', 'budget {rent}', 'between {lo} and {hi}',
+           'rent below {rent} per month']
+AMENITIES = ['wifi', 'food', 'ac', 'parking', 'laundry', 'cctv', 'clean', '24x7']
+QUALITIES = ['', '', 'very safe', 'rating above {rating}', 'good food', 'well rated',
+             'safety at least {score}']
+
+
+@lru_cache(maxsize=4)
+def load_source(path: str = DEFAULT_SOURCE) -> pd.DataFrame:
+    """The real catalog the synthetic rows are sampled from (read once)"""
+    return pd.read_excel(path)
+
+
+def _decimals(values: np.ndarray) -> int:
+    """Fewest decimals that represent every observed value of a float column"""
+    values = values[~np.isnan(values)]
+    for decimals in range(7):
+        if np.allclose(values, np.round(values, decimals)):
+            return decimals
+    return 6
+
+
+def generate_catalog(n: int, seed: int = 0, source: str = DEFAULT_SOURCE,
+                     missing_rate: Optional[float] = None) -> pd.DataFrame:
+    """
+    Build a synthetic catalog with the Excel schema
+
+    Parameters:
+    -----------
+    n : int
+        Number of hostels to generate
+    seed : int
+        Random seed; the same (n, seed, source, missing_rate) always yields
+        the same frame
+    source : str
+        Excel catalog to sample rows from
+    missing_rate : float, optional
+        Extra fraction of numeric and amenity cells set to NaN; by default
+        only the source's own missing values are carried over
+
+    Returns:
+    --------
+    pd.DataFrame : n rows with the source's columns and unique Google_Maps_IDs
+    """
+    base = load_source(source)
+    rng = np.random.default_rng(seed)
+    df = base.iloc[rng.integers(0, len(base), size=n)].reset_index(drop=True)
+
+    # Jitter continuous columns within the observed range, at the observed precision
+    for col in df.columns:
+        if df[col].dtype.kind != 'f':
+            continue
+        observed = base[col].to_numpy(dtype=np.float64)
+        spread = np.nanstd(observed) * JITTER
+        if not spread:
+            continue
+        values = df[col].to_numpy(dtype=np.float64) + rng.normal(0.0, spread, size=n)
+        values = np.clip(values, np.nanmin(observed), np.nanmax(observed))
+        df[col] = np.round(values, _decimals(observed))
+
+    if missing_rate:
+        for col in HostelRecommender.numeric_columns + HostelRecommender.binary_columns:
+            if col in df.columns:
+                df[col] = df[col].astype(np.float64).mask(rng.random(n) < missing_rate)
+
+    df['Name'] = [f"Synthetic Hostel {i}" for i in range(n)]
+    df[HostelRecommender.id_column] = [f"SYN{seed}-{i:07d}" for i in range(n)]
+    return df
+
+
+def _compose_query(rng: random.Random) -> str:
+    """One natural-language request built from the fragment tables"""
+    parts = []
+    hostel_type = rng.choice(HOSTEL_TYPES)
+    parts.append(f"{hostel_type} hostel".strip())
+
+    distance = rng.choice(DISTANCES)
+    if distance:
+        parts.append(distance.format(km=rng.choice([1, 1.5, 2, 3, 5, 8])))
+
+    budget = rng.choice(BUDGETS)
+    if budget:
+        lo = rng.randrange(2000, 6000, 500)
+        parts.append(budget.format(rent=rng.randrange(3000, 9000, 500), lo=lo,
+                                   hi=lo + rng.randrange(1000, 4000, 500)))
+
+    amenities = rng.sample(AMENITIES, rng.choice([0, 0, 1, 2, 3]))
+    if amenities:
+        parts.append("with " + " and ".join(amenities))
+
+    quality = rng.choice(QUALITIES)
+    if quality:
+        parts.append(quality.format(rating=rng.choice([3, 3.5, 4, 4.5]), score=rng.choice([1, 2, 3])))
+
+    return " ".join(parts)
+
+
+def generate_queries(n: int, seed: int = 0,
+                     extractor: Optional[EnhancedPreferenceExtractor] = None
+                     ) -> List[Tuple[str, Dict[str, float]]]:
+    """
+    Generate seeded chat queries and the preferences extracted from them
+
+    Parameters:
+    -----------
+    n : int
+        Number of queries
+    seed : int
+        Random seed for the query texts
+    extractor : EnhancedPreferenceExtractor, optional
+        Extractor to parse the texts with; a default one is built if omitted
+
+    Returns:
+    --------
+    list of (str, dict) : Query text and its extract_and_validate() preferences
+    """
+    rng = random.Random(seed)
+    extractor = extractor or EnhancedPreferenceExtractor()
+    texts = [_compose_query(rng) for _ in range(n)]
+    return [(text, extractor.extract_and_validate(text)[0]) for text in texts]
@@ -5,23 +5,291 @@ Extracts user preferences from natural language text.
 
 Features:
 - Natural language understanding
-- Fuzzy matching for better recognition
+- Fuzzy matching for better recognition (typo correction via a deletion index;
+  words in the bundled english_words.txt are never corrected)
 - Synonym handling
 - Context-aware extraction
 - Validation and error handling
 - Rent range support ("between X and Y", "X to Y", "at least X")
 - Fixed 'k' notation (only replaces digit+k, e.g. 5k -> 5000)
-- No dependencies on ML libraries
+- Single-pass keyword scanning shared by all extract_* methods
+- Optional bounded LRU memo for repeated messages (cache_size=N)
+- No dependencies on ML libraries; stage timings are recorded through
+  metrics.py when it is importable and skipped otherwise
 
 Usage:
-    python enhanced_preference_extraction.py
+    python enhanced_preference_extraction.py                       # interactive demo
+    python enhanced_preference_extraction.py messages.jsonl -o out.jsonl --workers 8
 
 Or import:
     from enhanced_preference_extraction import EnhancedPreferenceExtractor
 """
 
+import argparse
+import csv
+import itertools
+import json
+import os
 import re
-from typing import Dict, Optional, List, Tuple
+import sys
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from functools import lru_cache
+from types import SimpleNamespace
+from typing import Dict, FrozenSet, Iterable, Iterator, Optional, List, Tuple
+
+try:
+    import metrics
+except ImportError:  # imported without ml/ on sys.path: stages go untimed
+    metrics = SimpleNamespace(timer=lambda stage: nullcontext())
+
+
+def _is_word_char(char: str) -> bool:
+    """Same notion of a word character as the regex \\w class"""
+    return char.isalnum() or char == '_'
+
+
+class KeywordHits:
+    """
+    Hit map produced by KeywordScanner.scan().
+
+    Maps each vocabulary keyword found in the text to the list of positions
+    where it starts. Membership tests for words outside the scanner's
+    vocabulary fall back to a plain substring test, so callers never get a
+    silent miss for an unknown keyword.
+    """
+
+    __slots__ = ('text', 'positions', 'vocabulary')
+
+    def __init__(self, text: str, positions: Dict[str, List[int]], vocabulary: frozenset):
+        self.text = text
+        self.positions = positions
+        self.vocabulary = vocabulary
+
+    def __contains__(self, keyword: str) -> bool:
+        if keyword in self.vocabulary:
+            return keyword in self.positions
+        return keyword in self.text
+
+    def any(self, keywords: Iterable[str]) -> bool:
+        """True if at least one of the keywords occurs in the text"""
+        if not self.positions.keys().isdisjoint(keywords):
+            return True
+        if self.vocabulary.issuperset(keywords):
+            return False
+        return any(kw in self.text for kw in keywords if kw not in self.vocabulary)
+
+    def starts(self, keyword: str) -> List[int]:
+        """Start positions of a vocabulary keyword (empty if absent)"""
+        return self.positions.get(keyword, [])
+
+    def is_word_at(self, keyword: str, start: int) -> bool:
+        """True if the occurrence of keyword at start is not part of a longer word"""
+        text = self.text
+        end = start + len(keyword)
+        if start > 0 and _is_word_char(text[start - 1]):
+            return False
+        return end >= len(text) or not _is_word_char(text[end])
+
+    def has_word(self, keyword: str) -> bool:
+        """
+        True if the keyword occurs as a whole word, i.e. the equivalent of
+        re.search(r'\\bkeyword\\b') for keywords that begin and end with a
+        word character.
+        """
+        return any(self.is_word_at(keyword, start) for start in self.starts(keyword))
+
+    def any_word(self, keywords: Iterable[str]) -> bool:
+        """True if at least one vocabulary keyword occurs as a whole word"""
+        return any(self.has_word(kw) for kw in self.positions.keys() & set(keywords))
+
+
+class KeywordScanner:
+    """
+    Single-pass multi-keyword matcher.
+
+    All keywords are folded into one trie-shaped regular expression wrapped in
+    a lookahead, so the regex engine walks the trie once per text position and
+    reports the longest keyword starting there. Shorter keywords that are
+    prefixes of that match are added from a precomputed table. Matching cost
+    depends on the text length and keyword depth, not on how many keyword
+    lists the extractor carries.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.vocabulary = frozenset(kw for kw in keywords if kw)
+        # Every keyword implies the vocabulary entries that are its prefixes
+        self._implied = {
+            kw: [other for other in self.vocabulary if kw.startswith(other)]
+            for kw in self.vocabulary
+        }
+        self._pattern = re.compile('(?=(' + self._trie_regex(self.vocabulary) + '))')
+
+    @staticmethod
+    def _trie_regex(keywords: Iterable[str]) -> str:
+        """Build a regex that walks a character trie, preferring longer keywords"""
+        trie = {}
+        for kw in keywords:
+            node = trie
+            for char in kw:
+                node = node.setdefault(char, {})
+            node[''] = {}
+
+        def emit(node: dict) -> str:
+            branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+            if not branches:
+                return ''
+            body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+            # A keyword ends here: try the longer continuations first
+            if '' in node:
+                return '(?:' + body + ')?'
+            return body
+
+        return emit(trie) if trie else '(?!)'
+
+    def scan(self, text: str) -> KeywordHits:
+        """Scan the text once and return every keyword occurrence"""
+        positions: Dict[str, List[int]] = {}
+        implied = self._implied
+        for match in self._pattern.finditer(text):
+            start = match.start()
+            for kw in implied[match.group(1)]:
+                positions.setdefault(kw, []).append(start)
+        return KeywordHits(text, positions, self.vocabulary)
+
+
+def _edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Optimal-string-alignment distance (insertions, deletions, substitutions
+    and adjacent transpositions), or limit + 1 once it is known to exceed limit
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+def _inflections(word: str) -> set:
+    """
+    Regular inflections of a word and of its stem
+
+    "mixed" -> mix, mixes, mixer, mixing, ...; "late" -> later, lated, ...
+    Only used to keep real words out of typo correction, so over-generating
+    a few non-words is harmless.
+    """
+    stems = {word}
+    if word.endswith('ies'):
+        stems.add(word[:-3] + 'y')
+    else:
+        for suffix in ('ing', 'ed', 'er', 'es', 'ly', 'y', 's'):
+            if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+                stem = word[:-len(suffix)]
+                stems.update((stem, stem + 'e'))
+    forms = set()
+    for stem in stems:
+        if stem.endswith('e'):
+            forms.update(stem + end for end in ('', 's', 'd', 'r', 'ly'))
+            forms.add(stem[:-1] + 'ing')
+        elif stem.endswith('y'):
+            forms.update(stem[:-1] + end for end in ('ies', 'ied', 'ier', 'ily'))
+            forms.update(stem + end for end in ('', 's', 'ing'))
+        else:
+            forms.update(stem + end for end in ('', 's', 'es', 'ed', 'er', 'ing', 'ly', 'y'))
+    return forms
+
+
+# Bundled list of common English words that typo correction must leave alone
+DICTIONARY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'english_words.txt')
+
+
+@lru_cache(maxsize=None)
+def load_dictionary(path: str = DICTIONARY_PATH) -> FrozenSet[str]:
+    """
+    Words of a word-list file (one per line, '#' comments) and their
+    regular inflections; an empty set if the file is missing
+    """
+    words = set()
+    try:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                word = line.strip().lower()
+                if word and not word.startswith('#'):
+                    words.update(_inflections(word))
+    except OSError:
+        print(f"[WARN] Dictionary not found: {path}; typo correction may rewrite real words")
+    return frozenset(words)
+
+
+class FuzzyIndex:
+    """
+    Symmetric-deletion index for typo-tolerant word lookup.
+
+    Every vocabulary word is stored under all strings reachable by deleting
+    up to max_distance characters. A query generates its own deletions and
+    only the words sharing one of them are verified with a bounded edit
+    distance, so lookup cost depends on the query length, not on the
+    vocabulary size. Candidates must keep the query's first letter: typos
+    rarely change it, while real words one edit away often do
+    ("looking" / "cooking"). Tokens in `known` (real English words and
+    inflections of the vocabulary, e.g. "start", "nearly") are never
+    corrected.
+    """
+
+    def __init__(self, words: Iterable[str], max_distance: int = 1,
+                 known: Iterable[str] = ()):
+        self.max_distance = max_distance
+        self.words = frozenset(words)
+        self.known = frozenset(known)
+        self._deletes: Dict[str, List[str]] = {}
+        for word in self.words:
+            for variant in self._deletions(word, max_distance):
+                self._deletes.setdefault(variant, []).append(word)
+
+    @staticmethod
+    def _deletions(word: str, depth: int) -> set:
+        """The word plus every string reachable by deleting up to depth characters"""
+        variants = {word}
+        frontier = {word}
+        for _ in range(depth):
+            frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+            variants |= frontier
+        return variants
+
+    def lookup(self, token: str) -> Optional[str]:
+        """Closest vocabulary word within max_distance, or None"""
+        if token in self.words:
+            return token
+        if token in self.known:
+            return None
+        candidates = set()
+        for variant in self._deletions(token, self.max_distance):
+            candidates.update(self._deletes.get(variant, ()))
+
+        best, best_key = None, None
+        for word in candidates:
+            if word[0] != token[0]:
+                continue
+            distance = _edit_distance(token, word, self.max_distance)
+            if distance > self.max_distance:
+                continue
+            # Closest first, then the most similar length, then alphabetical
+            key = (distance, abs(len(word) - len(token)), word)
+            if best_key is None or key < best_key:
+                best, best_key = word, key
+        return best
 
 
 class EnhancedPreferenceExtractor:
@@ -29,8 +297,29 @@ class EnhancedPreferenceExtractor:
     Enhanced preference extraction with NLP capabilities
     """
     
-    def __init__(self):
-        """Initialize with default preferences and keyword mappings"""
+    def __init__(self, cache_size: int = 0, features: Optional[Iterable[str]] = None,
+                 fuzzy_distance: int = 1, fuzzy_min_length: int = 5,
+                 dictionary_path: str = DICTIONARY_PATH):
+        """
+        Initialize with default preferences and keyword mappings
+
+        Parameters:
+        -----------
+        cache_size : int
+            Max memoized extract_and_validate() results; 0 disables the memo
+        features : iterable of str, optional
+            Recommender feature columns (e.g. HostelRecommender.binary_columns);
+            only amenities in this list are extracted. Default: every amenity
+            in the table below.
+        fuzzy_distance : int
+            Max edit distance when correcting misspelled keywords
+            ("secuirty" -> "security"); 0 disables typo correction
+        fuzzy_min_length : int
+            Shorter words are never corrected (too many false matches)
+        dictionary_path : str
+            Word list of real words that are never corrected ("means"
+            stays "means", not "mens"); default: bundled english_words.txt
+        """
         
         # Default preferences (fallback values)
         self.default_prefs = {
@@ -64,13 +353,17 @@ class EnhancedPreferenceExtractor:
             'rating', 'rated', 'stars', 'review', 'reviews',
             'google rating', 'score', 'reputation'
         ]
+        # Only these name the hostel rating itself; "safety score" or
+        # "good reviews" must not turn into a min_rating filter
+        self.rating_bound_keywords = ['rating', 'rated', 'stars', 'google rating']
         
         self.food_keywords = [
             'food', 'meal', 'mess', 'dining', 'breakfast',
             'lunch', 'dinner', 'cuisine', 'cooking'
         ]
         
-        # Amenity keywords with synonyms
+        # Amenity keywords with synonyms, keyed by recommender column.
+        # Keywords of up to three characters (e.g. 'ac') only count as whole words.
         self.amenity_keywords = {
             'WiFi_Available': [
                 'wifi', 'wi-fi', 'internet', 'broadband', 'connection',
@@ -80,16 +373,62 @@ class EnhancedPreferenceExtractor:
                 'food', 'mess', 'meal', 'dining', 'cafeteria',
                 'kitchen', 'cooking', 'breakfast', 'lunch', 'dinner'
             ],
+            'AC_Available': [
+                'ac', 'a/c', 'air conditioning', 'air conditioned',
+                'air-conditioned', 'airconditioned', 'air conditioner'
+            ],
+            'Parking_Available': [
+                'parking', 'car park', 'bike', 'vehicle', 'two wheeler',
+                'two-wheeler', 'garage'
+            ],
+            'Laundry_Available': [
+                'laundry', 'washing machine', 'washer', 'washing', 'ironing'
+            ],
             'CCTV_Security': [
                 'cctv', 'camera', 'surveillance', 'security camera',
                 'monitoring', 'video surveillance'
+            ],
+            'Is_Clean': [
+                'clean', 'hygienic', 'hygiene', 'tidy', 'well maintained',
+                'well-maintained'
+            ],
+            'Open_24x7': [
+                '24x7', '24/7', '24 x 7', 'open 24', 'round the clock',
+                'no curfew', 'no time restriction', 'late entry'
             ]
         }
+        if features is not None:
+            features = set(features)
+            self.amenity_keywords = {
+                name: keywords for name, keywords in self.amenity_keywords.items()
+                if name in features
+            }
+
+        # Negation phrases around an amenity: "no wifi", "ac not needed"
+        self.negation_prefixes = ['no', 'without', 'dont need', "don't need", 'not required']
+        self.negation_suffixes = ['not required', 'not needed', 'optional']
         
         # Intensity modifiers
         self.high_intensity = ['very', 'extremely', 'highly', 'really', 'super', 'must']
         self.low_intensity = ['somewhat', 'fairly', 'moderately', 'reasonably']
 
+        # Qualitative descriptors, checked in order: (value, phrases)
+        self.distance_descriptors = [
+            (1.0, ['very near', 'walking distance', 'very close']),
+            (2.0, ['near cusat', 'close to cusat', 'near campus', 'close to campus', 'nearby']),
+            (5.0, ['far', 'distant']),
+        ]
+        self.rent_descriptors = [
+            (3000.0, ['cheap', 'affordable', 'low budget']),
+            (8000.0, ['expensive', 'high budget', 'premium']),
+        ]
+        # Score descriptors map to a fraction of the maximum score
+        self.score_descriptors = [
+            (0.9, ['high', 'very', 'excellent', 'great', 'top']),
+            (0.7, ['good', 'decent', 'okay']),
+            (0.3, ['low', 'poor', 'bad']),
+        ]
+
         # Gender / hostel-type keyword maps
         self.gents_keywords = [
             'mens', "men's", 'men', 'boys', "boy's", 'gents', 'gent',
@@ -102,77 +441,251 @@ class EnhancedPreferenceExtractor:
         self.mixed_keywords = [
             'mixed', 'coed', 'co-ed', 'co ed', 'any type', 'any gender'
         ]
-        
+
+        # Compile every regex once so extraction never rebuilds patterns
+        self._compile_patterns()
+
+        # One scanner over every keyword table; each text is scanned once
+        self.scanner = KeywordScanner(self._vocabulary())
+
+        # Typo correction over the words of every keyword table
+        self.domain_words = ['hostel', 'hostels', 'cusat', 'campus', 'kilometers', 'kilometres']
+        self.fuzzy_min_length = fuzzy_min_length
+        self.fuzzy_index = None
+        if fuzzy_distance > 0:
+            words = {word for kw in self._vocabulary() + self.domain_words
+                     for word in self._word_pattern.findall(kw)
+                     if len(word) >= fuzzy_min_length - fuzzy_distance}
+            # Real words (and forms of the keywords themselves) are never
+            # corrected: "means" is not a typo of "mens", nor "start" of "stars"
+            known = set(load_dictionary(dictionary_path))
+            for word in words:
+                known.update(_inflections(word))
+            self.fuzzy_index = FuzzyIndex(words, max_distance=fuzzy_distance, known=known - words)
+        # Corrections already looked up (token -> replacement), bounded
+        self._corrections: Dict[str, str] = {}
+
+        # Hard filters: only ever set from words the user actually typed,
+        # never from a typo correction (see _extract_stated)
+        self.hard_constraints = ['hostel_type', 'max_distance', 'rent_min', 'rent_max', 'min_rating']
+
+        # Preference keys that are always set together from one stated value
+        self.linked_preferences = [
+            ('Distance_from_CUSAT_km', 'max_distance'),
+            ('Estimated_Monthly_Rent', 'rent_min', 'rent_max'),
+            ('Rating', 'min_rating'),
+        ]
+
+        # Opt-in LRU memo of extract_and_validate() results and of the stated
+        # preferences behind them (shared with extract_delta())
+        self.cache_size = cache_size
+        self._init_cache()
+
+    def _init_cache(self):
+        self._cache: OrderedDict = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.cache_hits = self.cache_misses = self.cache_evictions = 0
+
+    def __getstate__(self):
+        # Locks do not pickle; worker copies start with an empty memo
+        state = self.__dict__.copy()
+        for name in ('_cache', '_cache_lock', 'cache_hits', 'cache_misses', 'cache_evictions'):
+            state.pop(name, None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_cache()
+
+    @staticmethod
+    def _alternation(keywords: List[str]) -> str:
+        """Merge keywords into one regex alternation"""
+        return '|'.join(re.escape(kw) for kw in keywords)
+
+    @staticmethod
+    def _compile_score_patterns(keywords: List[str]) -> List[Tuple[str, List[re.Pattern]]]:
+        """
+        Explicit-score patterns for one keyword list.
+
+        Kept per keyword (in list order) rather than merged: the first
+        keyword with a valid score wins, and a merged alternation would
+        pick the leftmost keyword in the text instead.
+        """
+        number = r'(?P<num>\d+(?:\.\d+)?)'
+        return [
+            (kw, [
+                re.compile(rf'{kw}\s*(?:above|over|at least|min|minimum|more than)?\s*{number}'),
+                re.compile(rf'{number}\s*{kw}'),
+                re.compile(rf'{kw}.*?{number}'),
+            ])
+            for kw in keywords
+        ]
+
+    def _vocabulary(self) -> List[str]:
+        """All keywords and phrases the extract_* methods look up"""
+        tables = [
+            self.distance_keywords, self.rent_keywords, self.safety_keywords,
+            self.rating_keywords, self.food_keywords, self.high_intensity,
+            self.low_intensity, self.gents_keywords, self.ladies_keywords,
+            self.mixed_keywords,
+        ]
+        tables.extend(self.amenity_keywords.values())
+        for descriptors in (self.distance_descriptors, self.rent_descriptors, self.score_descriptors):
+            tables.extend(phrases for _, phrases in descriptors)
+        return [kw for table in tables for kw in table]
+
+    def scan(self, text: str) -> KeywordHits:
+        """Single pass over the text producing the keyword hit map"""
+        return self.scanner.scan(text)
+
+    def _compile_patterns(self):
+        """Build the pattern bank used by preprocess() and the extract_* methods"""
+        self._k_notation_pattern = re.compile(r'(\d+)[kK]\b')
+        # Whole units only, so a misspelling like "kilometerz" is not read as "kmz"
+        self._kilometer_pattern = re.compile(r'kilomet(?:er|re)s?(?![a-z])')
+        self._word_pattern = re.compile(r'[a-z]+')
+
+        self._distance_patterns = [
+            re.compile(r'(within|under|less than|max|maximum|not more than|up to|around)\s*(\d+(?:\.\d+)?)\s*km'),
+            re.compile(r'(\d+(?:\.\d+)?)\s*km\s*(or less|maximum|max|away)'),
+            re.compile(r'(\d+(?:\.\d+)?)\s*km'),
+        ]
+
+        self._rent_patterns = [
+            re.compile(r'(?:under|below|less than|max(?:imum)?|budget|around|approximately)\s*(\d{3,6})'),
+            re.compile(r'(\d{3,6})\s*(?:rupees|per month|monthly|budget|rent)'),
+            re.compile(r'budget\s*(\d{3,6})'),
+            re.compile(r'(\d{3,6})'),
+        ]
+        self._rent_range_patterns = [
+            # "between X and Y" / "X and Y"
+            re.compile(r'between\s*(\d{3,6})\s*(?:and|to|-)\s*(\d{3,6})'),
+            # "X to Y" / "X - Y"
+            re.compile(r'(\d{3,6})\s*(?:to|-)\s*(\d{3,6})'),
+        ]
+        # Lower-bound only: "at least X" / "minimum X" / "more than X"
+        self._rent_lower_bound_pattern = re.compile(
+            r'(?:at least|minimum|min|more than|above)\s*(\d{3,6})'
+        )
+
+        self._score_patterns = {
+            tuple(keywords): self._compile_score_patterns(keywords)
+            for keywords in (self.safety_keywords, self.rating_keywords, self.food_keywords)
+        }
+
+        # Amenity table compiled for the scanner: keyword -> features it names
+        self._amenity_features: Dict[str, List[str]] = {}
+        for feature_name, keywords in self.amenity_keywords.items():
+            for kw in keywords:
+                self._amenity_features.setdefault(kw, []).append(feature_name)
+        self._whole_word_amenities = frozenset(kw for kw in self._amenity_features if len(kw) <= 3)
+        self._negation_prefixes = tuple(self.negation_prefixes)
+        # The suffix may follow a plural of the keyword ("meals optional")
+        self._negation_suffix_pattern = re.compile(
+            r'(?:e?s)?\s*(?:' + self._alternation(self.negation_suffixes) + ')'
+        )
+
     def preprocess(self, text: str) -> str:
         """Clean and normalize input text"""
+        return self._normalize(text)[0]
+
+    def _normalize(self, text: str) -> Tuple[str, str]:
+        """
+        preprocess() plus the same text without typo correction
+
+        Returns (normalized, literal); both are the same string when no
+        word was corrected. Hard constraints are only read from the
+        literal text (see _extract_stated).
+        """
         # Convert to lowercase
         text = text.lower()
+        literal = self._clean(text)
+
+        # Correct misspelled keywords before anything matches on them
+        if self.fuzzy_index is not None:
+            corrected = self._word_pattern.sub(lambda m: self._correct_word(m.group(0)), text)
+            if corrected != text:
+                return self._clean(corrected), literal
+        return literal, literal
 
+    def _clean(self, text: str) -> str:
+        """Currency, units, 'k' notation and whitespace of lowercased text"""
         # Remove currency symbols and normalize units via simple replacements
         simple_replacements = [
             ('₹', ''),
             ('rs.', ''),
             ('rupees', ''),
-            ('kilometers', 'km'),
-            ('kilometer', 'km'),
             ('kms', 'km'),
             ('metres', 'm'),
             ('meters', 'm'),
         ]
+        text = self._kilometer_pattern.sub('km', text)
         for old, new in simple_replacements:
             text = text.replace(old, new)
 
         # FIX: only expand 'k' when immediately preceded by a digit (e.g. 5k -> 5000)
         # Previously 'k': '000' was applied globally, corrupting words like 'okay', 'km', etc.
-        text = re.sub(r'(\d+)[kK]\b', lambda m: str(int(m.group(1)) * 1000), text)
+        text = self._k_notation_pattern.sub(lambda m: str(int(m.group(1)) * 1000), text)
 
         # Normalize whitespace
-        text = ' '.join(text.split())
+        return ' '.join(text.split())
 
-        return text
-    
-    def extract_distance(self, text: str) -> Optional[float]:
-        """Extract distance preference from text"""
-        # Pattern for explicit distance
-        patterns = [
-            r'(within|under|less than|max|maximum|not more than|up to|around)\s*(\d+(?:\.\d+)?)\s*km',
-            r'(\d+(?:\.\d+)?)\s*km\s*(or less|maximum|max|away)',
-            r'(\d+(?:\.\d+)?)\s*km'
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text)
+    def _correct_word(self, word: str) -> str:
+        """Replacement for one word: itself, or the keyword it misspells"""
+        if len(word) < self.fuzzy_min_length:
+            return word
+        correction = self._corrections.get(word)
+        if correction is None:
+            correction = self.fuzzy_index.lookup(word) or word
+            if len(self._corrections) >= 50_000:
+                self._corrections.clear()
+            self._corrections[word] = correction
+        return correction
+
+    def extract_distance(self, text: str, hits: Optional[KeywordHits] = None,
+                         explicit_only: bool = False) -> Optional[float]:
+        """
+        Extract distance preference from text
+
+        With explicit_only, only a number in km counts; "near cusat" or
+        "far" return None.
+        """
+        # Patterns for explicit distance
+        for pattern in self._distance_patterns:
+            match = pattern.search(text)
             if match:
                 # Extract the number (could be in different groups)
                 numbers = [g for g in match.groups() if g and g.replace('.', '').isdigit()]
                 if numbers:
                     return float(numbers[0])
+        if explicit_only:
+            return None
         
         # Handle qualitative descriptions
-        if any(phrase in text for phrase in ['very near', 'walking distance', 'very close']):
-            return 1.0
-        if any(phrase in text for phrase in ['near cusat', 'close to cusat', 'nearby']):
-            return 2.0
-        if 'far' in text or 'distant' in text:
-            return 5.0
+        if hits is None:
+            hits = self.scan(text)
+        for value, phrases in self.distance_descriptors:
+            if hits.any(phrases):
+                return value
             
         return None
     
-    def extract_rent(self, text: str) -> Optional[float]:
-        """Extract rent/budget upper-bound preference from text"""
-        if not any(kw in text for kw in self.rent_keywords):
+    def extract_rent(self, text: str, hits: Optional[KeywordHits] = None,
+                     explicit_only: bool = False) -> Optional[float]:
+        """
+        Extract rent/budget upper-bound preference from text
+
+        With explicit_only, only a stated amount counts; "cheap" or
+        "expensive" return None.
+        """
+        if hits is None:
+            hits = self.scan(text)
+        if not hits.any(self.rent_keywords):
             return None
 
         # Patterns for upper-bound / single-value rent
-        patterns = [
-            r'(?:under|below|less than|max(?:imum)?|budget|around|approximately)\s*(\d{3,6})',
-            r'(\d{3,6})\s*(?:rupees|per month|monthly|budget|rent)',
-            r'budget\s*(\d{3,6})',
-            r'(\d{3,6})'
-        ]
-
-        for pattern in patterns:
-            match = re.search(pattern, text)
+        for pattern in self._rent_patterns:
+            match = pattern.search(text)
             if match:
                 numbers = [g for g in match.groups() if g and g.isdigit()]
                 if numbers:
@@ -180,12 +693,13 @@ class EnhancedPreferenceExtractor:
                     if value < 100:  # Likely already-multiplied k value missed
                         value *= 1000
                     return value
+        if explicit_only:
+            return None
 
         # Qualitative fallback
-        if 'cheap' in text or 'affordable' in text or 'low budget' in text:
-            return 3000.0
-        if 'expensive' in text or 'high budget' in text or 'premium' in text:
-            return 8000.0
+        for value, phrases in self.rent_descriptors:
+            if hits.any(phrases):
+                return value
 
         return None
 
@@ -199,14 +713,8 @@ class EnhancedPreferenceExtractor:
           - "minimum 3000" (returns (3000, inf))
         Returns a (min, max) tuple, or None if no range found.
         """
-        range_patterns = [
-            # "between X and Y" / "X and Y"
-            r'between\s*(\d{3,6})\s*(?:and|to|-)\s*(\d{3,6})',
-            # "X to Y" / "X - Y"
-            r'(\d{3,6})\s*(?:to|-)\s*(\d{3,6})'
-        ]
-        for pattern in range_patterns:
-            match = re.search(pattern, text)
+        for pattern in self._rent_range_patterns:
+            match = pattern.search(text)
             if match:
                 lo, hi = float(match.group(1)), float(match.group(2))
                 if lo < 100:
@@ -216,118 +724,162 @@ class EnhancedPreferenceExtractor:
                 return (min(lo, hi), max(lo, hi))
 
         # Lower-bound only: "at least X" / "minimum X" / "more than X"
-        lower_bound_patterns = [
-            r'(?:at least|minimum|min|more than|above)\s*(\d{3,6})'
-        ]
-        for pattern in lower_bound_patterns:
-            match = re.search(pattern, text)
-            if match:
-                lo = float(match.group(1))
-                if lo < 100:
-                    lo *= 1000
-                return (lo, float('inf'))
+        match = self._rent_lower_bound_pattern.search(text)
+        if match:
+            lo = float(match.group(1))
+            if lo < 100:
+                lo *= 1000
+            return (lo, float('inf'))
 
         return None
     
-    def extract_score(self, text: str, keywords: List[str], max_score: float = 10.0) -> Optional[float]:
-        """Extract numerical score from text"""
+    def extract_score(self, text: str, keywords: List[str], max_score: float = 10.0,
+                      hits: Optional[KeywordHits] = None,
+                      explicit_only: bool = False) -> Optional[float]:
+        """
+        Extract numerical score from text
+
+        With explicit_only, only a number right next to a keyword counts
+        ("rating above 4", "4.5 stars"); qualitative words and numbers
+        further along the sentence return None.
+        """
+        if hits is None:
+            hits = self.scan(text)
+
         # Check if any keyword is present
-        if not any(kw in text for kw in keywords):
+        if not hits.any(keywords):
             return None
         
-        # Pattern for explicit scores
-        for kw in keywords:
-            patterns = [
-                rf'{kw}\s*(above|over|at least|min|minimum|more than)?\s*(\d+(?:\.\d+)?)',
-                rf'(\d+(?:\.\d+)?)\s*{kw}',
-                rf'{kw}.*?(\d+(?:\.\d+)?)'
-            ]
-            
-            for pattern in patterns:
-                match = re.search(pattern, text)
+        # Patterns for explicit scores; only keywords present in the text are searched
+        keyword_patterns = self._score_patterns.get(tuple(keywords))
+        if keyword_patterns is None:
+            keyword_patterns = self._compile_score_patterns(keywords)
+            self._score_patterns[tuple(keywords)] = keyword_patterns
+
+        for kw, patterns in keyword_patterns:
+            if kw not in hits:
+                continue
+            # The last pattern allows anything between keyword and number
+            for pattern in patterns[:2] if explicit_only else patterns:
+                match = pattern.search(text)
                 if match:
-                    # Extract number
-                    numbers = [g for g in match.groups() if g and re.match(r'\d+(?:\.\d+)?', g)]
-                    if numbers:
-                        score = float(numbers[0])
-                        # Validate score range
-                        if 0 <= score <= max_score:
-                            return score
+                    score = float(match.group('num'))
+                    # Validate score range
+                    if 0 <= score <= max_score:
+                        return score
+        if explicit_only:
+            return None
         
-        # Handle qualitative descriptions
-        if any(kw in text for kw in keywords):
-            if any(word in text for word in ['high', 'very', 'excellent', 'great', 'top']):
-                return max_score * 0.9  # 90% of max
-            if any(word in text for word in ['good', 'decent', 'okay']):
-                return max_score * 0.7  # 70% of max
-            if any(word in text for word in ['low', 'poor', 'bad']):
-                return max_score * 0.3  # 30% of max
+        # Handle qualitative descriptions (90% / 70% / 30% of max)
+        for fraction, words in self.score_descriptors:
+            if hits.any(words):
+                return max_score * fraction
                 
         return None
     
-    def extract_hostel_type(self, text: str) -> Optional[str]:
+    def extract_hostel_type(self, text: str, hits: Optional[KeywordHits] = None) -> Optional[str]:
         """Extract hostel type (Gents / Ladies / Mixed) from text."""
-        text_lower = text.lower()
+        if hits is None or text != text.lower():
+            hits = self.scan(text.lower())
 
         # Check Mixed first (most specific phrase)
-        for kw in self.mixed_keywords:
-            if kw in text_lower:
-                return 'Mixed'
+        if hits.any(self.mixed_keywords):
+            return 'Mixed'
 
-        # Check Ladies
-        for kw in self.ladies_keywords:
-            # Use word-boundary matching to avoid false hits
-            if re.search(r'\b' + re.escape(kw) + r'\b', text_lower):
-                return 'Ladies'
+        # Check Ladies (word-boundary matching to avoid false hits)
+        if hits.any_word(self.ladies_keywords):
+            return 'Ladies'
 
         # Check Gents
-        for kw in self.gents_keywords:
-            if re.search(r'\b' + re.escape(kw) + r'\b', text_lower):
-                return 'Gents'
+        if hits.any_word(self.gents_keywords):
+            return 'Gents'
 
         return None
 
-    def extract_boolean(self, text: str, feature_name: str) -> Optional[int]:
+    def extract_amenities(self, text: str, hits: Optional[KeywordHits] = None) -> Dict[str, int]:
+        """
+        Extract every amenity the text mentions in one pass over the keyword hits
+
+        Returns {feature_name: 1 (required) or 0 (explicitly not wanted)};
+        amenities that are not mentioned are left out.
+        """
+        if hits is None:
+            hits = self.scan(text)
+
+        amenities: Dict[str, int] = {}
+        for kw in hits.positions.keys() & self._amenity_features.keys():
+            whole_word = kw in self._whole_word_amenities
+            for start in hits.starts(kw):
+                if whole_word and not hits.is_word_at(kw, start):
+                    continue
+                value = 0 if self._is_negated(text, start, start + len(kw)) else 1
+                for feature_name in self._amenity_features[kw]:
+                    # A negation anywhere wins over plain mentions
+                    amenities[feature_name] = min(amenities.get(feature_name, 1), value)
+        return amenities
+
+    def _is_negated(self, text: str, start: int, end: int) -> bool:
+        """Whether the mention text[start:end] is preceded or followed by a negation"""
+        before = start
+        while before > 0 and text[before - 1].isspace():
+            before -= 1
+        if text.endswith(self._negation_prefixes, 0, before):
+            return True
+        return self._negation_suffix_pattern.match(text, end) is not None
+
+    def extract_boolean(self, text: str, feature_name: str,
+                        hits: Optional[KeywordHits] = None) -> Optional[int]:
         """Extract boolean preference (required/not required)"""
-        keywords = self.amenity_keywords.get(feature_name, [])
-        
-        # Check for negative indicators
-        negative_patterns = [
-            r'(no|without|dont need|don\'t need|not required)\s*(' + '|'.join(keywords) + ')',
-            r'(' + '|'.join(keywords) + r')\s*(not required|not needed|optional)'
-        ]
-        
-        for pattern in negative_patterns:
-            if re.search(pattern, text):
-                return 0
-        
-        # Check for positive indicators
-        positive_patterns = [
-            r'(need|want|require|must have|should have|with)\s*(' + '|'.join(keywords) + ')',
-            r'(' + '|'.join(keywords) + r')\s*(required|needed|necessary|mandatory|must)',
-            r'(' + '|'.join(keywords) + ')'
-        ]
-        
-        for pattern in positive_patterns:
-            if re.search(pattern, text):
-                # Check intensity
-                if any(word in text for word in self.high_intensity):
-                    return 1  # Definitely required
-                return 1  # Required
-        
-        return None  # Not mentioned
-    
+        if feature_name not in self.amenity_keywords:
+            return None
+        return self.extract_amenities(text, hits).get(feature_name)  # None if not mentioned
+
     def extract_preferences(self, text: str) -> Dict[str, float]:
         """Extract all preferences from natural language text"""
-        # Preprocess text
-        text = self.preprocess(text)
+        return self._extract_preprocessed(*self._normalize(text))
 
+    def _extract_preprocessed(self, text: str, literal: Optional[str] = None) -> Dict[str, float]:
+        """extract_preferences() for text that already went through preprocess()"""
         # Start with defaults
         prefs = self.default_prefs.copy()
-        # Note: hostel_type is NOT added here — it is only set when the user explicitly mentions it
+        # Note: hostel_type is NOT a default — it is only set when the user explicitly mentions it
+        prefs.update(self._stated(text, literal))
+        return prefs
+
+    def _stated(self, text: str, literal: Optional[str] = None) -> Dict[str, float]:
+        """
+        _extract_stated() through the memo, keyed on the normalized and
+        literal text; the returned dict is shared and must not be mutated
+        """
+        if self.cache_size <= 0:
+            return self._extract_stated(text, literal)
+        key = ('stated', text, literal)
+        stated = self._cache_get(key)
+        if stated is None:
+            stated = self._extract_stated(text, literal)
+            self._cache_put(key, stated)
+        return stated
+
+    def _extract_stated(self, text: str, literal: Optional[str] = None) -> Dict[str, float]:
+        """
+        Only the preferences the (preprocessed) text actually states
+
+        literal is the same text without typo correction (see _normalize());
+        a keyword found only through a correction still sets a soft target,
+        but the hard constraints are taken from the literal text alone.
+        """
+        # Collect every keyword hit in a single pass
+        hits = self.scan(text)
+        prefs = {}
 
         # Extract distance
-        distance = self.extract_distance(text)
+        distance = self.extract_distance(text, hits, explicit_only=True)
+        if distance is not None:
+            # Distances stated in km are upper limits, applied as a hard filter;
+            # "near cusat" / "far" stay soft targets
+            prefs['max_distance'] = distance
+        if distance is None:
+            distance = self.extract_distance(text, hits)
         if distance is not None:
             prefs['Distance_from_CUSAT_km'] = distance
 
@@ -340,38 +892,57 @@ class EnhancedPreferenceExtractor:
             # Use midpoint (or lower-bound) as the KNN target value
             prefs['Estimated_Monthly_Rent'] = (lo + hi) / 2 if hi != float('inf') else lo
         else:
-            rent = self.extract_rent(text)
+            rent = self.extract_rent(text, hits, explicit_only=True)
             if rent is not None:
-                prefs['Estimated_Monthly_Rent'] = rent
+                # A stated amount is a budget ceiling, applied as a hard filter;
+                # "cheap" / "expensive" only move the soft rent target
                 prefs['rent_min'] = None
                 prefs['rent_max'] = rent
+            else:
+                rent = self.extract_rent(text, hits)
+            if rent is not None:
+                prefs['Estimated_Monthly_Rent'] = rent
 
         # Extract safety score
-        safety = self.extract_score(text, self.safety_keywords, max_score=10.0)
+        safety = self.extract_score(text, self.safety_keywords, max_score=10.0, hits=hits)
         if safety is not None:
             prefs['Safety_Score'] = safety
 
         # Extract rating
-        rating = self.extract_score(text, self.rating_keywords, max_score=5.0)
+        rating = self.extract_score(text, self.rating_keywords, max_score=5.0, hits=hits)
         if rating is not None:
             prefs['Rating'] = rating
+            # Only an explicit number on the rating itself is a hard minimum
+            min_rating = self.extract_score(text, self.rating_bound_keywords, max_score=5.0,
+                                            hits=hits, explicit_only=True)
+            if min_rating is not None:
+                prefs['min_rating'] = min_rating
 
         # Extract food quality
-        food_quality = self.extract_score(text, self.food_keywords, max_score=10.0)
+        food_quality = self.extract_score(text, self.food_keywords, max_score=10.0, hits=hits)
         if food_quality is not None:
             prefs['Food_Quality_Score'] = food_quality
 
-        # Extract boolean amenities
-        for feature_name in ['WiFi_Available', 'Food_Available', 'CCTV_Security']:
-            value = self.extract_boolean(text, feature_name)
-            if value is not None:
-                prefs[feature_name] = value
+        # Extract boolean amenities (table order, one pass over the hits)
+        amenities = self.extract_amenities(text, hits)
+        for feature_name in self.amenity_keywords:
+            if feature_name in amenities:
+                prefs[feature_name] = amenities[feature_name]
 
         # Extract hostel type (gender filter)
-        hostel_type = self.extract_hostel_type(text)
+        hostel_type = self.extract_hostel_type(text, hits)
         if hostel_type is not None:
             prefs['hostel_type'] = hostel_type
 
+        if literal is not None and literal != text:
+            # "which means ..." corrected to "mens" must not become a Gents filter
+            strict = self._extract_stated(literal)
+            for key in self.hard_constraints:
+                if key in strict:
+                    prefs[key] = strict[key]
+                else:
+                    prefs.pop(key, None)
+
         return prefs
     
     def validate_preferences(self, prefs: Dict[str, float]) -> Tuple[bool, List[str]]:
@@ -382,11 +953,15 @@ class EnhancedPreferenceExtractor:
         if prefs['Distance_from_CUSAT_km'] < 0 or prefs['Distance_from_CUSAT_km'] > 20:
             warnings.append(f"Distance {prefs['Distance_from_CUSAT_km']} km seems unusual. Using default.")
             prefs['Distance_from_CUSAT_km'] = self.default_prefs['Distance_from_CUSAT_km']
+            prefs.pop('max_distance', None)
         
         # Validate rent
         if prefs['Estimated_Monthly_Rent'] < 500 or prefs['Estimated_Monthly_Rent'] > 20000:
             warnings.append(f"Rent Rs.{prefs['Estimated_Monthly_Rent']} seems unusual. Using default.")
             prefs['Estimated_Monthly_Rent'] = self.default_prefs['Estimated_Monthly_Rent']
+            if 'rent_max' in prefs:
+                prefs['rent_min'] = None
+                prefs['rent_max'] = None
         
         # Validate scores
         if not (0 <= prefs['Safety_Score'] <= 10):
@@ -396,6 +971,7 @@ class EnhancedPreferenceExtractor:
         if not (0 <= prefs['Rating'] <= 5):
             warnings.append("Rating out of range. Using default.")
             prefs['Rating'] = self.default_prefs['Rating']
+            prefs.pop('min_rating', None)
         
         if not (0 <= prefs['Food_Quality_Score'] <= 10):
             warnings.append("Food quality score out of range. Using default.")
@@ -416,16 +992,243 @@ class EnhancedPreferenceExtractor:
         --------
         tuple : (preferences_dict, list_of_warnings)
         """
-        # Extract preferences
-        prefs = self.extract_preferences(text)
-        
-        # Validate
-        is_valid, warnings = self.validate_preferences(prefs)
-        
-        return prefs, warnings
+        if self.cache_size <= 0:
+            # Extract preferences
+            with metrics.timer('extractor.preprocess'):
+                normalized, literal = self._normalize(text)
+            with metrics.timer('extractor.extract'):
+                prefs = self._extract_preprocessed(normalized, literal)
+
+            # Validate
+            with metrics.timer('extractor.validate'):
+                is_valid, warnings = self.validate_preferences(prefs)
+
+            return prefs, warnings
+
+        # Exact repeats skip preprocessing; variants that normalize to the same
+        # text (case, spacing, currency symbols) skip the extraction chain
+        result = self._cache_get(('text', text))
+        if result is None:
+            with metrics.timer('extractor.preprocess'):
+                normalized, literal = self._normalize(text)
+            with metrics.timer('extractor.extract'):
+                prefs = self._extract_preprocessed(normalized, literal)
+            with metrics.timer('extractor.validate'):
+                is_valid, warnings = self.validate_preferences(prefs)
+            result = (prefs, warnings)
+            self._cache_put(('text', text), result)
+
+        # Callers mutate the returned dict, so never hand out the cached objects
+        prefs, warnings = result
+        return dict(prefs), list(warnings)
+
+    def extract_delta(self, text: str) -> Tuple[Dict[str, float], List[str]]:
+        """
+        Extract only the preferences a message states, without defaults
+
+        Used for follow-up chat messages ("actually make it ladies only"):
+        the delta is merged over the preferences gathered so far. Values
+        that fail validation are left out of the delta instead of being
+        reset to defaults, so they cannot clobber earlier turns.
+
+        Parameters:
+        -----------
+        text : str
+            One chat message
+
+        Returns:
+        --------
+        tuple : (stated_preferences_dict, list_of_warnings)
+        """
+        with metrics.timer('extractor.preprocess'):
+            normalized, literal = self._normalize(text)
+        with metrics.timer('extractor.extract'):
+            stated = self._stated(normalized, literal)
+
+        prefs = self.default_prefs.copy()
+        prefs.update(stated)
+        with metrics.timer('extractor.validate'):
+            is_valid, warnings = self.validate_preferences(prefs)
+
+        # A rejected value drops every key derived from it (e.g. rent_min/rent_max)
+        rejected = {key for key, value in stated.items() if key not in prefs or prefs[key] != value}
+        for group in self.linked_preferences:
+            if rejected.intersection(group):
+                rejected.update(group)
+
+        delta = {key: value for key, value in stated.items() if key not in rejected}
+        return delta, warnings
+
+    def _cache_get(self, key):
+        with self._cache_lock:
+            result = self._cache.get(key)
+            if result is not None:
+                self._cache.move_to_end(key)
+                self.cache_hits += 1
+            elif key[0] == 'stated':
+                # A 'text' miss falls through to the 'stated' key; count it once
+                self.cache_misses += 1
+            return result
+
+    def _cache_put(self, key, result):
+        with self._cache_lock:
+            self._cache[key] = result
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+                self.cache_evictions += 1
+
+    def cache_stats(self) -> dict:
+        """Hit/miss counters of the extraction memo"""
+        with self._cache_lock:
+            lookups = self.cache_hits + self.cache_misses
+            return {
+                "size": len(self._cache),
+                "maxsize": self.cache_size,
+                "hits": self.cache_hits,
+                "misses": self.cache_misses,
+                "hitRate": round(self.cache_hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.cache_evictions,
+            }
+
+    def clear_cache(self):
+        """Drop every memoized result (e.g. after editing the keyword tables)"""
+        with self._cache_lock:
+            self._cache.clear()
+
+    def extract_many(self, texts: Iterable[str], workers: Optional[int] = None,
+                     chunksize: int = 256) -> Iterator[Tuple[Dict[str, float], List[str]]]:
+        """
+        Extract and validate preferences for a stream of texts
+
+        Inputs are consumed lazily in chunks and, with more than one worker,
+        fanned out over a process pool. At most ``2 * workers`` chunks are in
+        flight at once, so memory stays constant however long the stream is.
+
+        Parameters:
+        -----------
+        texts : iterable of str
+            Texts to process (may be a generator)
+        workers : int, optional
+            Worker processes; None or 1 runs in the current process,
+            0 uses os.cpu_count()
+        chunksize : int
+            Texts sent to a worker per task
+
+        Returns:
+        --------
+        generator of (preferences_dict, list_of_warnings), in input order
+        """
+        if workers == 0:
+            workers = os.cpu_count() or 1
+        if chunksize < 1:
+            raise ValueError("chunksize must be at least 1")
+
+        if workers is None or workers <= 1:
+            for text in texts:
+                yield self.extract_and_validate(text)
+            return
+
+        iterator = iter(texts)
+        # Workers receive a copy of this extractor, including any customised keyword tables
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(self,)) as pool:
+            pending = deque()
+            while True:
+                while len(pending) < 2 * workers:
+                    chunk = list(itertools.islice(iterator, chunksize))
+                    if not chunk:
+                        break
+                    pending.append(pool.submit(_extract_chunk, chunk))
+                if not pending:
+                    break
+                yield from pending.popleft().result()
+
+
+# Per-process extractor used by extract_many() workers
+_worker_extractor: Optional[EnhancedPreferenceExtractor] = None
+
+
+def _init_worker(extractor: EnhancedPreferenceExtractor):
+    global _worker_extractor
+    _worker_extractor = extractor
+
+
+def _extract_chunk(texts: List[str]) -> List[Tuple[Dict[str, float], List[str]]]:
+    return [_worker_extractor.extract_and_validate(text) for text in texts]
+
+
+def _read_records(stream, fmt: str, text_field: str) -> Iterator[dict]:
+    """Yield input records as dicts; JSONL lines may also be bare strings"""
+    if fmt == 'csv':
+        for row in csv.DictReader(stream):
+            yield row
+        return
+
+    for line_no, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"line {line_no}: invalid JSON ({e})")
+        yield record if isinstance(record, dict) else {text_field: record}
+
+
+def run_batch(args) -> int:
+    """Extract preferences for every record of a JSONL/CSV file, writing JSONL"""
+    fmt = args.format
+    if fmt is None:
+        fmt = 'csv' if args.input.lower().endswith('.csv') else 'jsonl'
+
+    extractor = EnhancedPreferenceExtractor()
+    infile = sys.stdin if args.input == '-' else open(args.input, newline='', encoding='utf-8')
+    outfile = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    count = 0
+    try:
+        records, inputs = itertools.tee(_read_records(infile, fmt, args.text_field))
+        texts = (str(record.get(args.text_field) or '') for record in inputs)
+        results = extractor.extract_many(texts, workers=args.workers, chunksize=args.chunksize)
+        for record, (prefs, warnings) in zip(records, results):
+            record['preferences'] = prefs
+            record['warnings'] = warnings
+            outfile.write(json.dumps(record, ensure_ascii=False) + '\n')
+            count += 1
+    finally:
+        if infile is not sys.stdin:
+            infile.close()
+        if outfile is not sys.stdout:
+            outfile.close()
+
+    print(f"[OK] Extracted preferences for {count} records", file=sys.stderr)
+    return count
+
+
+def main(argv: Optional[List[str]] = None):
+    """Batch extraction from a file, or the interactive demo when no input is given"""
+    parser = argparse.ArgumentParser(description="Extract hostel preferences from natural language")
+    parser.add_argument('input', nargs='?',
+                        help="JSONL or CSV file of messages ('-' for stdin); omit for the interactive demo")
+    parser.add_argument('-o', '--output', default='-',
+                        help="JSONL output file (default: stdout)")
+    parser.add_argument('--format', choices=['jsonl', 'csv'],
+                        help="input format (default: from the file extension)")
+    parser.add_argument('--text-field', default='text',
+                        help="field holding the message text (default: text)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="worker processes (0 = one per CPU, default: run in-process)")
+    parser.add_argument('--chunksize', type=int, default=256,
+                        help="messages per worker task (default: 256)")
+    args = parser.parse_args(argv)
+
+    if args.input is None:
+        interactive_demo()
+    else:
+        run_batch(args)
 
 
-def main():
+def interactive_demo():
     """Interactive demo - Extract preferences only"""
     print("="*80)
     print("HOSTEL PREFERENCE EXTRACTION (NLP)")
@@ -5,18 +5,512 @@ This script implements a K-Nearest Neighbors recommendation system
 to help students find suitable hostels near CUSAT based on their preferences.
 """
 
+import argparse
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from types import SimpleNamespace
+try:
+    import fcntl
+except ImportError:  # Windows: ArtifactStore.lock() only serializes threads
+    fcntl = None
 import pandas as pd
 import numpy as np
 from sklearn.preprocessing import MinMaxScaler
 from sklearn.impute import KNNImputer
+from sklearn.neighbors import KDTree, BallTree
 import warnings
+try:
+    import metrics
+except ImportError:  # imported without ml/ on sys.path: stages go untimed
+    metrics = SimpleNamespace(timer=lambda stage: nullcontext())
 warnings.filterwarnings('ignore')
 
 
+class ReadWriteLock:
+    """
+    Many concurrent readers or one writer.
+
+    Recommendation queries take the read side; catalog updates take the
+    write side so they never interleave with a query reading the arrays.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = False
+
+    @contextmanager
+    def read(self):
+        with self._cond:
+            while self._writer:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if self._readers == 0:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._cond:
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+
+class ScoringEngine:
+    """
+    Array-only scoring state compiled once from a prepared recommender.
+
+    Holds everything the request path needs as contiguous NumPy arrays so a
+    query never has to touch a DataFrame: the scaled and weight-scaled
+    feature matrices, cached per-column medians, the scaler's min/scale
+    arrays and the mask of "lower is better" features.
+    """
+
+    def __init__(self, X_scaled, feature_columns, weights, scaler, medians,
+                 inverted_features=(), X_weighted=None):
+        """
+        Parameters:
+        -----------
+        X_scaled : array-like
+            Scaled (and direction-inverted) feature matrix, one row per hostel
+        feature_columns : list
+            Column names matching the columns of X_scaled
+        weights : dict
+            Feature weights; missing features default to 0.01
+        scaler : MinMaxScaler
+            Scaler fitted on the raw feature matrix
+        medians : array-like
+            Per-column medians used for features the user did not specify
+        inverted_features : iterable
+            Features where a lower raw value is better
+        X_weighted : array-like, optional
+            Precomputed weight-scaled matrix (e.g. memory-mapped from a
+            model artifact); derived from X_scaled when omitted
+        """
+        self.feature_columns = list(feature_columns)
+        self.column_index = {col: i for i, col in enumerate(self.feature_columns)}
+
+        weight_vector = np.array([weights.get(col, 0.01) for col in self.feature_columns],
+                                 dtype=np.float64)
+        self.weight_vector = weight_vector / weight_vector.sum()
+        self.sqrt_weights = np.sqrt(self.weight_vector)
+
+        self.X_scaled = np.ascontiguousarray(X_scaled, dtype=np.float64)
+        # Weighted Euclidean distance == plain Euclidean distance in sqrt(w)-scaled space
+        if X_weighted is None:
+            X_weighted = self.X_scaled * self.sqrt_weights
+        self.X_weighted = np.ascontiguousarray(X_weighted, dtype=np.float64)
+        self.row_norms = np.einsum('ij,ij->i', self.X_weighted, self.X_weighted)
+
+        self.medians = np.asarray(medians, dtype=np.float64)
+        self.data_min = np.asarray(scaler.data_min_, dtype=np.float64)
+        self.data_max = np.asarray(scaler.data_max_, dtype=np.float64)
+        self.scale = np.asarray(scaler.scale_, dtype=np.float64)
+        self.offset = np.asarray(scaler.min_, dtype=np.float64)
+        self.inverted = np.array([col in inverted_features for col in self.feature_columns])
+
+    def make_writable(self):
+        """Copy any read-only (memory-mapped) arrays so they can be updated in place"""
+        for name in ('X_scaled', 'X_weighted', 'row_norms'):
+            values = getattr(self, name)
+            if not values.flags.writeable:
+                setattr(self, name, np.array(values))
+
+    def set_rows(self, rows, rows_scaled):
+        """Overwrite scaled feature rows (and their weighted copies) in place"""
+        self.X_scaled[rows] = rows_scaled
+        self.X_weighted[rows] = rows_scaled * self.sqrt_weights
+        self.row_norms[rows] = np.einsum('ij,ij->i', self.X_weighted[rows], self.X_weighted[rows])
+
+    def append_rows(self, rows_scaled):
+        """Append scaled feature rows"""
+        weighted = rows_scaled * self.sqrt_weights
+        self.X_scaled = np.vstack([self.X_scaled, rows_scaled])
+        self.X_weighted = np.vstack([self.X_weighted, weighted])
+        self.row_norms = np.concatenate([self.row_norms, np.einsum('ij,ij->i', weighted, weighted)])
+
+    def delete_rows(self, rows):
+        """Remove rows by position"""
+        self.X_scaled = np.delete(self.X_scaled, rows, axis=0)
+        self.X_weighted = np.delete(self.X_weighted, rows, axis=0)
+        self.row_norms = np.delete(self.row_norms, rows)
+
+    def set_scaler(self, scaler):
+        """Pick up new scaler parameters after the observed range has grown"""
+        self.data_min = np.asarray(scaler.data_min_, dtype=np.float64)
+        self.data_max = np.asarray(scaler.data_max_, dtype=np.float64)
+        self.scale = np.asarray(scaler.scale_, dtype=np.float64)
+        self.offset = np.asarray(scaler.min_, dtype=np.float64)
+
+    def scale_rows(self, X_raw):
+        """Scale raw feature rows exactly as prepare_features() does"""
+        X = np.asarray(X_raw, dtype=np.float64) * self.scale + self.offset
+        X[:, self.inverted] = 1 - X[:, self.inverted]
+        return X
+
+    def scale_preferences(self, user_preferences):
+        """
+        Map a raw preference dict into the scaled feature space.
+
+        Keys that are not feature columns are ignored and missing features
+        fall back to the cached catalog median.
+
+        Returns:
+        --------
+        np.ndarray : Scaled preference vector
+        """
+        prefs = self.medians.copy()
+        for col, value in user_preferences.items():
+            i = self.column_index.get(col)
+            if i is not None and value is not None:
+                prefs[i] = value
+
+        # Clip to the scaler's observed range, then apply X * scale_ + min_
+        np.clip(prefs, self.data_min, self.data_max, out=prefs)
+        prefs = prefs * self.scale + self.offset
+        prefs[self.inverted] = 1 - prefs[self.inverted]
+        return prefs
+
+    def distances(self, prefs_scaled, rows=None):
+        """
+        Weighted Euclidean distance from a scaled preference vector to each hostel.
+
+        Parameters:
+        -----------
+        prefs_scaled : np.ndarray
+            Scaled preference vector
+        rows : np.ndarray, optional
+            Positional row indexes to score; all rows when omitted
+
+        Returns:
+        --------
+        np.ndarray : Distance per scored row
+        """
+        X = self.X_weighted if rows is None else self.X_weighted[rows]
+        diff = X - prefs_scaled * self.sqrt_weights
+        return np.sqrt(np.einsum('ij,ij->i', diff, diff))
+
+    def contributions(self, rows, prefs_scaled):
+        """
+        Per-feature match contributions for selected rows, as one matrix.
+
+        Each cell is (1 - |x - q|) * w for that hostel and feature, rounded
+        to 4 decimals.
+
+        Parameters:
+        -----------
+        rows : np.ndarray
+            Positional row indexes
+        prefs_scaled : np.ndarray
+            Scaled preference vector
+
+        Returns:
+        --------
+        np.ndarray : (rows x features) contribution matrix
+        """
+        diff = np.abs(self.X_scaled[rows] - prefs_scaled)
+        return np.round((1 - diff) * self.weight_vector, 4)
+
+    def distances_many(self, prefs_scaled_matrix, rows=None):
+        """
+        Weighted Euclidean distances for a block of queries in one matrix operation.
+
+        Uses ||x - q||^2 = ||x||^2 + ||q||^2 - 2 x.q so the whole block is a
+        single (queries x features) @ (features x hostels) product.
+
+        Parameters:
+        -----------
+        prefs_scaled_matrix : np.ndarray
+            Scaled preference vectors, one row per query
+        rows : np.ndarray, optional
+            Positional row indexes to score; all rows when omitted
+
+        Returns:
+        --------
+        np.ndarray : (queries x scored rows) distance matrix
+        """
+        if rows is None:
+            X, row_norms = self.X_weighted, self.row_norms
+        else:
+            X, row_norms = self.X_weighted[rows], self.row_norms[rows]
+
+        Q = prefs_scaled_matrix * self.sqrt_weights
+        squared = (row_norms[np.newaxis, :]
+                   + np.einsum('ij,ij->i', Q, Q)[:, np.newaxis]
+                   - 2.0 * (Q @ X.T))
+        np.maximum(squared, 0.0, out=squared)
+        return np.sqrt(squared, out=squared)
+
+
+def select_top_k(row_dist, candidates, k):
+    """
+    Partial selection of the k nearest candidates.
+
+    Parameters:
+    -----------
+    row_dist : np.ndarray
+        Distance for each candidate
+    candidates : np.ndarray
+        Positional row indexes the distances belong to
+    k : int
+        Number of rows to keep (at most len(candidates))
+
+    Returns:
+    --------
+    tuple : (rows, distances) sorted best first
+    """
+    if k < len(candidates):
+        part = np.argpartition(row_dist, k - 1)[:k]
+    else:
+        part = np.arange(len(candidates))
+    # Sort by distance, ties broken by catalog order (as nsmallest does)
+    order = part[np.lexsort((candidates[part], row_dist[part]))]
+    return candidates[order], row_dist[order]
+
+
+class RankedList:
+    """
+    Every candidate of one query with its distance, ordered on demand.
+
+    Holds the result of a single scoring pass so results can be paged
+    without re-scoring: only the prefix a page needs is partially sorted,
+    and the full ordering is computed once when a page goes past it.
+    """
+
+    __slots__ = ('candidates', 'distances', 'prefs_scaled', 'catalog_version', '_ranked')
+
+    def __init__(self, candidates, distances, prefs_scaled, catalog_version):
+        self.candidates = candidates
+        self.distances = distances
+        self.prefs_scaled = prefs_scaled
+        self.catalog_version = catalog_version
+        # Sorted prefix (rows, distances); swapped as one tuple so readers never see a mix
+        self._ranked = (candidates[:0], distances[:0])
+
+    def __len__(self):
+        return len(self.candidates)
+
+    @property
+    def nbytes(self):
+        return self.candidates.nbytes + self.distances.nbytes + self.prefs_scaled.nbytes
+
+    def slice(self, start, stop):
+        """(rows, distances) ranked start..stop-1, best first"""
+        stop = min(stop, len(self.candidates))
+        rows, dist = self._ranked
+        if stop > len(rows):
+            # The first page only needs a partial sort; later pages sort everything once
+            k = stop if not len(rows) else len(self.candidates)
+            rows, dist = self._ranked = select_top_k(self.distances, self.candidates, k)
+        return rows[start:stop], dist[start:stop]
+
+
+class ExactIndex:
+    """
+    Brute-force linear scan over the weight-scaled feature matrix.
+
+    Always correct; used as the default backend and as the reference when
+    verifying approximate or tree-based backends.
+    """
+
+    def __init__(self, engine, partitions):
+        """
+        Parameters:
+        -----------
+        engine : ScoringEngine
+            Compiled scoring engine
+        partitions : dict
+            Type-partition key -> positional row indexes
+        """
+        self.engine = engine
+        self.partitions = partitions
+
+    def query(self, prefs_scaled, key, k):
+        """
+        k nearest rows in one type partition.
+
+        Returns:
+        --------
+        tuple : (rows, distances) sorted best first
+        """
+        candidates = self.partitions[key]
+        distances = self.engine.distances(prefs_scaled, candidates)
+        return select_top_k(distances, candidates, min(k, len(candidates)))
+
+    def query_many(self, prefs_scaled_matrix, key, k, chunk_size):
+        """
+        k nearest rows for a block of queries, scored chunk by chunk.
+
+        Returns:
+        --------
+        list of tuple : (rows, distances) per query
+        """
+        candidates = self.partitions[key]
+        k = min(k, len(candidates))
+        results = []
+        for start in range(0, len(prefs_scaled_matrix), chunk_size):
+            distances = self.engine.distances_many(
+                prefs_scaled_matrix[start:start + chunk_size], candidates
+            )
+            results.extend(select_top_k(row_dist, candidates, k) for row_dist in distances)
+        return results
+
+
+class TreeIndex:
+    """
+    Metric-tree index over the weight-scaled feature space.
+
+    Builds one sklearn tree per type partition, so the gender/type filter
+    is honoured without post-filtering, and answers k-NN queries in
+    sub-linear time on large catalogs.
+    """
+
+    tree_class = KDTree
+
+    def __init__(self, engine, partitions, leaf_size=40):
+        """
+        Parameters:
+        -----------
+        engine : ScoringEngine
+            Compiled scoring engine
+        partitions : dict
+            Type-partition key -> positional row indexes
+        leaf_size : int
+            Leaf size passed to the sklearn tree
+        """
+        self.engine = engine
+        self.partitions = partitions
+        self.trees = {
+            key: self.tree_class(engine.X_weighted[rows], leaf_size=leaf_size)
+            for key, rows in partitions.items() if len(rows)
+        }
+
+    def query(self, prefs_scaled, key, k):
+        """
+        k nearest rows in one type partition.
+
+        Returns:
+        --------
+        tuple : (rows, distances) sorted best first
+        """
+        return self.query_many(prefs_scaled[np.newaxis, :], key, k)[0]
+
+    def query_many(self, prefs_scaled_matrix, key, k, chunk_size=None):
+        """
+        k nearest rows for a block of queries in one tree traversal call.
+
+        Returns:
+        --------
+        list of tuple : (rows, distances) per query
+        """
+        candidates = self.partitions[key]
+        k = min(k, len(candidates))
+        if k == 0:
+            empty = (candidates[:0], np.empty(0))
+            return [empty] * len(prefs_scaled_matrix)
+
+        distances, positions = self.trees[key].query(
+            prefs_scaled_matrix * self.engine.sqrt_weights, k=k
+        )
+        results = []
+        for row_dist, pos in zip(distances, positions):
+            rows = candidates[pos]
+            order = np.lexsort((rows, row_dist))
+            results.append((rows[order], row_dist[order]))
+        return results
+
+
+class BallTreeIndex(TreeIndex):
+    """Ball-tree variant of TreeIndex; holds up better as feature count grows"""
+
+    tree_class = BallTree
+
+
+# Index backends selectable by name through HostelRecommender(index=...)
+INDEX_BACKENDS = {
+    'exact': ExactIndex,
+    'kd_tree': TreeIndex,
+    'ball_tree': BallTreeIndex,
+}
+
+
+# Bump whenever the on-disk layout written by export_artifact() changes
+ARTIFACT_FORMAT_VERSION = 3
+
+
 class HostelRecommender:
     """KNN-based hostel recommendation system"""
 
-    def __init__(self, data_path='CUSAT_Private_Hostels_ML_Updated.xlsx'):
+    # Numeric columns filled by KNNImputer
+    numeric_columns = ['Rating', 'Rating_Count', 'Distance_from_CUSAT_km',
+                       'Estimated_Monthly_Rent', 'Safety_Score', 'Food_Quality_Score']
+
+    # Amenity flags normalized to 0/1
+    binary_columns = ['WiFi_Available', 'Food_Available', 'AC_Available',
+                      'Parking_Available', 'Laundry_Available', 'CCTV_Security',
+                      'Is_Clean', 'Open_24x7']
+
+    # Column that identifies a hostel for upsert_hostel() / delete_hostel()
+    id_column = 'Google_Maps_ID'
+
+    # Features where a lower raw value is better (scaled as 1 - x)
+    inverted_features = ('Distance_from_CUSAT_km', 'Estimated_Monthly_Rent')
+
+    # Hostel types admitted by each requested hostel_type (others see every row)
+    type_filters = {
+        'Gents': ('Gents', 'Mixed'),
+        'Ladies': ('Ladies', 'Mixed'),
+    }
+
+    # Hard range filters: preference key -> (column, bound it sets)
+    range_filters = {
+        'rent_min': ('Estimated_Monthly_Rent', 'min'),
+        'rent_max': ('Estimated_Monthly_Rent', 'max'),
+        'max_distance': ('Distance_from_CUSAT_km', 'max'),
+        'min_safety': ('Safety_Score', 'min'),
+        'min_rating': ('Rating', 'min'),
+    }
+
+    # Placeholder values that mean "not known" in a range-filter column;
+    # such rows never satisfy a bound (a rent of 0 is missing, not free)
+    unknown_values = {
+        'Estimated_Monthly_Rent': 0.0,
+    }
+
+    # Human-readable labels used in explanations
+    feature_labels = {
+        'Distance_from_CUSAT_km': 'Within distance limit',
+        'Estimated_Monthly_Rent': 'Matches your budget',
+        'Safety_Score': 'High safety score',
+        'Rating': 'Well rated',
+        'Food_Quality_Score': 'Good food quality',
+        'WiFi_Available': 'Has WiFi',
+        'Food_Available': 'Food provided',
+        'AC_Available': 'Has AC',
+        'Parking_Available': 'Has parking',
+        'Laundry_Available': 'Has laundry',
+        'CCTV_Security': 'Has CCTV security',
+        'Is_Clean': 'Clean facility',
+        'Open_24x7': 'Open 24/7',
+    }
+
+    def __init__(self, data_path='CUSAT_Private_Hostels_ML_Updated.xlsx', index='exact'):
         """
         Initialize the recommender system
 
@@ -24,13 +518,34 @@ class HostelRecommender:
         -----------
         data_path : str
             Path to the Excel file containing hostel data
+        index : str or callable
+            Nearest-neighbour backend: a key of INDEX_BACKENDS ('exact',
+            'kd_tree', 'ball_tree') or a factory taking (engine, partitions)
         """
         self.data_path = data_path
+        self.index_backend = index
+        self.index = None
+        self.exact_index = None
         self.df = None
         self.df_processed = None
         self.scaler = MinMaxScaler()
         self.feature_columns = []
         self.X_scaled = None
+        self.engine = None
+        self.type_partitions = {}
+        self.sorted_indexes = {}
+
+        # Fitted imputer (or the data to fit it lazily after an artifact load)
+        self.imputer = None
+        self.imputer_columns = []
+        self.imputer_fit_X = None
+
+        # Bumped on every catalog change so callers can invalidate caches
+        self.catalog_version = 0
+        self._lock = ReadWriteLock()
+
+        # Upper bound on distances held in memory per recommend_many() block
+        self.batch_chunk_elements = 4_000_000
 
         # Default feature weights (can be customized)
         self.weights = {
@@ -63,21 +578,17 @@ class HostelRecommender:
         self.df_processed = self.df.copy()
 
         # Handle missing values with KNNImputer
-        numeric_cols = ['Rating', 'Rating_Count', 'Distance_from_CUSAT_km',
-                        'Estimated_Monthly_Rent', 'Safety_Score', 'Food_Quality_Score']
-        existing_numeric = [c for c in numeric_cols if c in self.df_processed.columns]
+        existing_numeric = [c for c in self.numeric_columns if c in self.df_processed.columns]
+        self.imputer_columns = existing_numeric
         if existing_numeric:
-            imputer = KNNImputer(n_neighbors=5)
-            self.df_processed[existing_numeric] = imputer.fit_transform(
-                self.df_processed[existing_numeric]
-            )
+            # Keep the fitted imputer so upsert_hostel() can impute new rows
+            self.imputer = KNNImputer(n_neighbors=5)
+            self.imputer_fit_X = self.df_processed[existing_numeric].to_numpy(dtype=np.float64)
+            self.df_processed[existing_numeric] = self.imputer.fit_transform(self.imputer_fit_X)
             print(f"[OK] KNNImputer applied to {existing_numeric}")
 
         # Ensure binary columns are 0 or 1
-        binary_cols = ['WiFi_Available', 'Food_Available', 'AC_Available',
-                       'Parking_Available', 'Laundry_Available', 'CCTV_Security',
-                       'Is_Clean', 'Open_24x7']
-        for col in binary_cols:
+        for col in self.binary_columns:
             if col in self.df_processed.columns:
                 self.df_processed[col] = self.df_processed[col].fillna(0).astype(int)
 
@@ -124,16 +635,484 @@ class HostelRecommender:
         )
 
         # Inverse scaling for "lower is better" features
-        if 'Distance_from_CUSAT_km' in self.X_scaled.columns:
-            self.X_scaled['Distance_from_CUSAT_km'] = 1 - self.X_scaled['Distance_from_CUSAT_km']
+        for col in self.inverted_features:
+            if col in self.X_scaled.columns:
+                self.X_scaled[col] = 1 - self.X_scaled[col]
+
+        # Row-index partitions for the gender/type filter
+        self._build_type_partitions()
+
+        # Presorted column indexes for the hard range filters
+        self._build_sorted_indexes()
+
+        # Compile the array-only scoring engine used by recommend()
+        self.engine = ScoringEngine(
+            self.X_scaled.values,
+            self.feature_columns,
+            self.weights,
+            self.scaler,
+            X.median().values,
+            self.inverted_features,
+        )
 
-        if 'Estimated_Monthly_Rent' in self.X_scaled.columns:
-            self.X_scaled['Estimated_Monthly_Rent'] = 1 - self.X_scaled['Estimated_Monthly_Rent']
+        self.build_index()
+        self.catalog_version += 1
 
         print(f"[OK] Prepared {len(self.feature_columns)} features")
         print(f"  Features: {self.feature_columns}")
         return self.X_scaled
 
+    def _source_signature(self):
+        """Size and mtime of the Excel source, used to detect stale artifacts"""
+        stat = os.stat(self.data_path)
+        return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+    def export_artifact(self, artifact_path):
+        """
+        Write the prepared model to a versioned, memory-mappable artifact
+
+        The artifact is a directory holding manifest.json (format version,
+        source signature, feature columns, weights, scaler parameters,
+        medians) plus one .npy file per catalog column, the scaled and
+        weight-scaled matrices, the type partitions and the presorted
+        filter indexes. It is written to a temporary directory first and
+        then moved into place.
+
+        Parameters:
+        -----------
+        artifact_path : str
+            Target directory
+
+        Returns:
+        --------
+        str : artifact_path
+        """
+        print(f"\nExporting model artifact to {artifact_path}...")
+        with self._lock.read():
+            self._write_artifact(artifact_path)
+        print(f"[OK] Exported artifact with {len(self.df_processed)} hostels")
+        return artifact_path
+
+    def _write_artifact(self, artifact_path):
+        """Write the artifact files; callers hold the read lock"""
+        suffix = f"{os.getpid()}-{threading.get_ident()}"
+        tmp_path = f"{artifact_path}.tmp-{suffix}"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+
+        catalog = []
+        for i, col in enumerate(self.df_processed.columns):
+            series = self.df_processed[col]
+            entry = {'name': col, 'file': f'col_{i:03d}.npy', 'dtype': str(series.dtype)}
+            if series.dtype.kind in 'biuf':
+                values = series.to_numpy()
+            else:
+                # Strings as fixed-width unicode so they stay memory-mappable
+                nulls = series.isna().to_numpy()
+                values = series.fillna('').astype(str).to_numpy(dtype=str)
+                if nulls.any():
+                    entry['nulls'] = f'col_{i:03d}_nulls.npy'
+                    np.save(os.path.join(tmp_path, entry['nulls']), nulls)
+            np.save(os.path.join(tmp_path, entry['file']), values)
+            catalog.append(entry)
+
+        if self.imputer_fit_X is not None:
+            np.save(os.path.join(tmp_path, 'imputer_fit_X.npy'), self.imputer_fit_X)
+
+        np.save(os.path.join(tmp_path, 'X_scaled.npy'), self.engine.X_scaled)
+        np.save(os.path.join(tmp_path, 'X_weighted.npy'), self.engine.X_weighted)
+
+        partitions = {}
+        for i, (key, rows) in enumerate(self.type_partitions.items()):
+            partitions[f'partition_{i}.npy'] = key
+            np.save(os.path.join(tmp_path, f'partition_{i}.npy'), rows)
+
+        sorted_indexes = {}
+        for i, (col, (order, _)) in enumerate(self.sorted_indexes.items()):
+            sorted_indexes[f'sorted_{i}.npy'] = col
+            np.save(os.path.join(tmp_path, f'sorted_{i}.npy'), order)
+
+        manifest = {
+            'format_version': ARTIFACT_FORMAT_VERSION,
+            'created_at': time.time(),
+            'source': self._source_signature(),
+            'n_rows': len(self.df_processed),
+            'catalog_version': self.catalog_version,
+            'feature_columns': self.feature_columns,
+            'imputer_columns': self.imputer_columns,
+            'weights': self.weights,
+            'inverted_features': list(self.inverted_features),
+            'medians': self.engine.medians.tolist(),
+            'scaler': {
+                'data_min': self.scaler.data_min_.tolist(),
+                'data_max': self.scaler.data_max_.tolist(),
+                'data_range': self.scaler.data_range_.tolist(),
+                'scale': self.scaler.scale_.tolist(),
+                'min': self.scaler.min_.tolist(),
+            },
+            'catalog': catalog,
+            'partitions': partitions,
+            'sorted_indexes': sorted_indexes,
+        }
+        with open(os.path.join(tmp_path, 'manifest.json'), 'w') as f:
+            json.dump(manifest, f)
+
+        # Swap the finished directory into place
+        old_path = f"{artifact_path}.old-{suffix}"
+        if os.path.exists(artifact_path):
+            os.replace(artifact_path, old_path)
+        os.replace(tmp_path, artifact_path)
+        shutil.rmtree(old_path, ignore_errors=True)
+
+    def artifact_is_current(self, artifact_path):
+        """
+        Check whether an artifact can be loaded instead of refitting
+
+        An artifact is stale when it is missing, was written by a different
+        format version, was built from a different source file, or was built
+        with different feature weights.
+        """
+        manifest_path = os.path.join(artifact_path, 'manifest.json')
+        if not os.path.exists(manifest_path):
+            return False
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        if manifest.get('format_version') != ARTIFACT_FORMAT_VERSION:
+            return False
+        if manifest.get('weights') != self.weights:
+            return False
+        if not os.path.exists(self.data_path):
+            # Artifact-only deployments have no source to compare against
+            return True
+        return manifest.get('source') == self._source_signature()
+
+    def load_artifact(self, artifact_path, mmap=True):
+        """
+        Load a model written by export_artifact()
+
+        Parameters:
+        -----------
+        artifact_path : str
+            Artifact directory
+        mmap : bool
+            Memory-map the arrays read-only instead of reading them into memory
+
+        Returns:
+        --------
+        pd.DataFrame : The imputed catalog frame
+        """
+        print(f"Loading model artifact from {artifact_path}...")
+        mmap_mode = 'r' if mmap else None
+        with open(os.path.join(artifact_path, 'manifest.json')) as f:
+            manifest = json.load(f)
+        if manifest['format_version'] != ARTIFACT_FORMAT_VERSION:
+            raise ValueError(f"Unsupported artifact format {manifest['format_version']}")
+
+        def load(name):
+            return np.load(os.path.join(artifact_path, name), mmap_mode=mmap_mode)
+
+        columns = {}
+        for entry in manifest['catalog']:
+            values = load(entry['file'])
+            if values.dtype.kind == 'U':
+                series = pd.Series(values.tolist(), dtype=entry['dtype'])
+                if 'nulls' in entry:
+                    series[load(entry['nulls'])] = None
+            else:
+                series = pd.Series(values, dtype=entry['dtype'], copy=False)
+            columns[entry['name']] = series
+        self.df = None
+        self.df_processed = pd.DataFrame(columns, copy=False)
+
+        self.feature_columns = manifest['feature_columns']
+        self.weights = manifest['weights']
+        self.catalog_version = manifest['catalog_version']
+
+        # The imputer is refitted lazily, only if a hostel is upserted
+        self.imputer = None
+        self.imputer_columns = manifest['imputer_columns']
+        self.imputer_fit_X = (load('imputer_fit_X.npy') if self.imputer_columns else None)
+
+        scaler = manifest['scaler']
+        self.scaler = MinMaxScaler()
+        self.scaler.data_min_ = np.array(scaler['data_min'])
+        self.scaler.data_max_ = np.array(scaler['data_max'])
+        self.scaler.data_range_ = np.array(scaler['data_range'])
+        self.scaler.scale_ = np.array(scaler['scale'])
+        self.scaler.min_ = np.array(scaler['min'])
+        self.scaler.n_features_in_ = len(self.feature_columns)
+        self.scaler.feature_names_in_ = np.array(self.feature_columns, dtype=object)
+        self.scaler.n_samples_seen_ = manifest['n_rows']
+
+        X_scaled = load('X_scaled.npy')
+        self.X_scaled = pd.DataFrame(X_scaled, columns=self.feature_columns, copy=False)
+
+        self.type_partitions = {
+            key: load(name) for name, key in manifest['partitions'].items()
+        }
+        self.sorted_indexes = {}
+        for name, col in manifest['sorted_indexes'].items():
+            order = load(name)
+            self.sorted_indexes[col] = (
+                order, self.df_processed[col].to_numpy(dtype=np.float64)[order]
+            )
+
+        self.engine = ScoringEngine(
+            X_scaled,
+            self.feature_columns,
+            self.weights,
+            self.scaler,
+            manifest['medians'],
+            manifest['inverted_features'],
+            X_weighted=load('X_weighted.npy'),
+        )
+        self.build_index()
+
+        print(f"[OK] Loaded {manifest['n_rows']} hostels from artifact")
+        return self.df_processed
+
+    def load_or_build(self, artifact_path):
+        """
+        Load the artifact if it is current, otherwise fit from the Excel
+        source and (best-effort) write a fresh artifact for the next boot
+        """
+        if self.artifact_is_current(artifact_path):
+            return self.load_artifact(artifact_path)
+
+        self.load_data()
+        self.preprocess_data()
+        self.prepare_features()
+        try:
+            self.export_artifact(artifact_path)
+        except OSError as exc:
+            print(f"[WARN] Could not write model artifact: {exc}")
+        return self.df_processed
+
+    def _get_imputer(self):
+        """Fitted KNNImputer, refitted from the stored fit data after an artifact load"""
+        if self.imputer is None and self.imputer_fit_X is not None:
+            self.imputer = KNNImputer(n_neighbors=5)
+            self.imputer.fit(self.imputer_fit_X)
+        return self.imputer
+
+    def _ensure_writable(self):
+        """Detach from read-only (memory-mapped) artifact arrays before a mutation"""
+        if not self.engine.X_scaled.flags.writeable:
+            self.df_processed = self.df_processed.copy()
+            self.engine.make_writable()
+
+    def _row_position(self, hostel_id):
+        """Positional index of a hostel by id, or None"""
+        matches = np.flatnonzero(self.df_processed[self.id_column].to_numpy() == hostel_id)
+        return int(matches[0]) if len(matches) else None
+
+    def _preprocess_record(self, hostel_id, record, pos):
+        """
+        Turn a raw hostel record into a processed row dict
+
+        Applies the same steps as preprocess_data() using the already-fitted
+        imputer; fields missing from an update keep their current values.
+        """
+        type_cols = [col for col in self.df_processed.columns if col.startswith('Type_')]
+        raw_columns = [col for col in self.df_processed.columns if col not in type_cols]
+
+        if pos is None:
+            row = {col: np.nan for col in raw_columns}
+        else:
+            current = self.df_processed.iloc[pos]
+            row = {col: current[col] for col in raw_columns}
+        row.update({col: value for col, value in record.items() if col in raw_columns})
+        row[self.id_column] = hostel_id
+
+        if self.imputer_columns:
+            values = np.array([[np.nan if row[col] is None else row[col]
+                                for col in self.imputer_columns]], dtype=np.float64)
+            if np.isnan(values).any():
+                values = self._get_imputer().transform(values)
+            row.update(zip(self.imputer_columns, values[0].tolist()))
+
+        for col in self.binary_columns:
+            if col in row:
+                value = row[col]
+                row[col] = 0 if value is None or pd.isna(value) else int(value)
+
+        if 'Hostel_Type' in row:
+            row['Hostel_Type'] = str(row['Hostel_Type']).strip()
+            known_types = set(self.df_processed['Hostel_Type'].unique())
+            if row['Hostel_Type'] not in known_types:
+                raise ValueError(f"Unknown Hostel_Type {row['Hostel_Type']!r}; "
+                                 f"expected one of {sorted(known_types)}")
+            for col in type_cols:
+                row[col] = row['Hostel_Type'] == col[len('Type_'):]
+        return row
+
+    def _expand_scaler(self, x_raw):
+        """
+        Grow the scaler range to cover a new raw feature row
+
+        Only columns where the new value falls outside the fitted min/max are
+        rescaled, each in a single O(n) pass.
+        """
+        below = x_raw < self.scaler.data_min_
+        above = x_raw > self.scaler.data_max_
+        changed = np.flatnonzero(below | above)
+        if len(changed) == 0:
+            return
+
+        self.scaler.data_min_ = np.minimum(self.scaler.data_min_, x_raw)
+        self.scaler.data_max_ = np.maximum(self.scaler.data_max_, x_raw)
+        self.scaler.data_range_ = self.scaler.data_max_ - self.scaler.data_min_
+        data_range = np.where(self.scaler.data_range_ == 0, 1.0, self.scaler.data_range_)
+        self.scaler.scale_ = 1.0 / data_range
+        self.scaler.min_ = -self.scaler.data_min_ * self.scaler.scale_
+        self.engine.set_scaler(self.scaler)
+
+        for j in changed:
+            col = self.feature_columns[j]
+            column = self.df_processed[col].to_numpy(dtype=np.float64)
+            column = column * self.engine.scale[j] + self.engine.offset[j]
+            if self.engine.inverted[j]:
+                column = 1 - column
+            self.engine.X_scaled[:, j] = column
+        # Refresh weighted copies for every row
+        self.engine.set_rows(slice(None), self.engine.X_scaled)
+        print(f"[OK] Rescaled {[self.feature_columns[j] for j in changed]}")
+
+    def _remove_from_sorted_indexes(self, pos, shift):
+        """Drop a row from every presorted filter index (O(n) per column)"""
+        for col, (order, sorted_values) in self.sorted_indexes.items():
+            keep = order != pos
+            order, sorted_values = order[keep], sorted_values[keep]
+            if shift:
+                order = np.where(order > pos, order - 1, order)
+            self.sorted_indexes[col] = (order, sorted_values)
+
+    def _insert_into_sorted_indexes(self, pos):
+        """Insert a row into every presorted filter index (O(n) per column)"""
+        for col, (order, sorted_values) in self.sorted_indexes.items():
+            value = float(self._filter_values(col, np.float64(self.df_processed[col].iat[pos])))
+            i = np.searchsorted(sorted_values, value, side='right')
+            self.sorted_indexes[col] = (np.insert(order, i, pos),
+                                        np.insert(sorted_values, i, value))
+
+    def _after_catalog_change(self):
+        """Refresh derived structures shared by every kind of catalog update"""
+        self.X_scaled = pd.DataFrame(self.engine.X_scaled, columns=self.feature_columns,
+                                     copy=False)
+        self.engine.medians = np.median(
+            self.df_processed[self.feature_columns].to_numpy(dtype=np.float64), axis=0
+        )
+        self._build_type_partitions()
+        self.build_index()
+        self.catalog_version += 1
+
+    def upsert_hostel(self, hostel_id, record):
+        """
+        Insert or update one hostel without refitting the model
+
+        Missing numeric values are imputed with the already-fitted
+        KNNImputer; the scaler is only widened (and the affected columns
+        rescaled) when a value falls outside its fitted range. Feature
+        matrix, type partitions, filter indexes and the NN index are all
+        updated in place.
+
+        Parameters:
+        -----------
+        hostel_id : str
+            Value of id_column identifying the hostel
+        record : dict
+            Raw column values (Excel schema); omitted fields keep their
+            current values on update
+
+        Returns:
+        --------
+        bool : True if a new hostel was inserted, False if one was updated
+        """
+        with self._lock.write():
+            self._ensure_writable()
+            pos = self._row_position(hostel_id)
+            row = self._preprocess_record(hostel_id, record, pos)
+            x_raw = np.array([row[col] for col in self.feature_columns], dtype=np.float64)
+            self._expand_scaler(x_raw)
+            x_scaled = self.engine.scale_rows(x_raw[np.newaxis, :])
+
+            inserted = pos is None
+            if inserted:
+                new_row = pd.DataFrame([row], columns=self.df_processed.columns)
+                new_row = new_row.astype(self.df_processed.dtypes.to_dict())
+                self.df_processed = pd.concat([self.df_processed, new_row], ignore_index=True)
+                pos = len(self.df_processed) - 1
+                self.engine.append_rows(x_scaled)
+            else:
+                for col, value in row.items():
+                    self.df_processed.at[pos, col] = value
+                self.engine.set_rows([pos], x_scaled)
+                self._remove_from_sorted_indexes(pos, shift=False)
+
+            self._insert_into_sorted_indexes(pos)
+            self._after_catalog_change()
+        return inserted
+
+    def delete_hostel(self, hostel_id):
+        """
+        Remove one hostel without refitting the model
+
+        Returns:
+        --------
+        bool : True if the hostel existed
+        """
+        with self._lock.write():
+            pos = self._row_position(hostel_id)
+            if pos is None:
+                return False
+            self._ensure_writable()
+            self.df_processed = self.df_processed.drop(index=pos).reset_index(drop=True)
+            self.engine.delete_rows([pos])
+            self._remove_from_sorted_indexes(pos, shift=True)
+            self._after_catalog_change()
+        return True
+
+    def build_index(self):
+        """Build the configured nearest-neighbour index over the scoring engine"""
+        backend = self.index_backend
+        if isinstance(backend, str):
+            if backend not in INDEX_BACKENDS:
+                raise ValueError(f"Unknown index backend {backend!r}; "
+                                 f"expected one of {list(INDEX_BACKENDS)}")
+            backend = INDEX_BACKENDS[backend]
+
+        self.exact_index = ExactIndex(self.engine, self.type_partitions)
+        self.index = (self.exact_index if backend is ExactIndex
+                      else backend(self.engine, self.type_partitions))
+        return self.index
+
+    def verify_index(self, list_of_prefs, k=5):
+        """
+        Compare the configured index against the exact scan
+
+        Parameters:
+        -----------
+        list_of_prefs : list of dict
+            Sample preference dicts
+        k : int
+            Number of neighbours compared per query
+
+        Returns:
+        --------
+        float : Mean recall@k of the index relative to the exact scan
+        """
+        recalls = []
+        for prefs in list_of_prefs:
+            prefs = dict(prefs)
+            key = self._partition_key(prefs.pop('hostel_type', None))
+            prefs_scaled = self.engine.scale_preferences(prefs)
+            expected, _ = self.exact_index.query(prefs_scaled, key, k)
+            if len(expected) == 0:
+                continue
+            found, _ = self.index.query(prefs_scaled, key, k)
+            recalls.append(len(np.intersect1d(expected, found)) / len(expected))
+        return float(np.mean(recalls)) if recalls else 1.0
+
     def calculate_weighted_distance(self, user_prefs_scaled):
         """
         Calculate weighted Euclidean distance between user preferences and all hostels
@@ -147,153 +1126,364 @@ class HostelRecommender:
         --------
         pd.Series : Distances for each hostel
         """
-        weight_vector = np.array([self.weights.get(col, 0.01) for col in self.feature_columns])
-        weight_vector = weight_vector / weight_vector.sum()
-
-        squared_diff = ((self.X_scaled - user_prefs_scaled) ** 2) * weight_vector
-        distances = np.sqrt(squared_diff.sum(axis=1))
-
-        return distances
+        prefs_scaled = np.asarray(user_prefs_scaled[self.feature_columns], dtype=np.float64)
+        return pd.Series(self.engine.distances(prefs_scaled), index=self.X_scaled.index)
 
     def get_explanation(self, hostel_row: pd.Series, user_prefs_scaled: pd.Series) -> dict:
         """
         Produce a human-readable explanation for a single recommendation.
         """
-        weight_vector = np.array([self.weights.get(col, 0.01) for col in self.feature_columns])
-        weight_vector = weight_vector / weight_vector.sum()
-
-        contributions = {}
-        for col, w in zip(self.feature_columns, weight_vector):
-            diff = abs(self.X_scaled.loc[hostel_row.name, col] - user_prefs_scaled[col])
-            contributions[col] = round(float((1 - diff) * w), 4)
-
-        sorted_contrib = sorted(contributions.items(), key=lambda x: x[1], reverse=True)
-        top_features = [(col, score) for col, score in sorted_contrib[:3]]
-        weak_features = [(col, score) for col, score in contributions.items() if score < 0.5]
-
-        label_map = {
-            'Distance_from_CUSAT_km': 'Within distance limit',
-            'Estimated_Monthly_Rent': 'Matches your budget',
-            'Safety_Score': 'High safety score',
-            'Rating': 'Well rated',
-            'Food_Quality_Score': 'Good food quality',
-            'WiFi_Available': 'Has WiFi',
-            'Food_Available': 'Food provided',
-            'AC_Available': 'Has AC',
-            'Parking_Available': 'Has parking',
-            'Laundry_Available': 'Has laundry',
-            'CCTV_Security': 'Has CCTV security',
-            'Is_Clean': 'Clean facility',
-            'Open_24x7': 'Open 24/7',
-        }
-        return {
-            'top_matches': [
-                {'feature': label_map.get(col, col), 'score': score}
-                for col, score in top_features
-            ],
-            'shortfalls': [
-                {'feature': label_map.get(col, col), 'score': score}
-                for col, score in weak_features
-            ]
-        }
+        row = self.df_processed.index.get_loc(hostel_row.name)
+        prefs_scaled = np.asarray(user_prefs_scaled[self.feature_columns], dtype=np.float64)
+        return self._explanations(np.array([row]), prefs_scaled)[0]
 
-    def recommend(self, user_preferences, k=5, show_details=True):
+    def _explanations(self, rows, prefs_scaled):
         """
-        Recommend top K hostels based on user preferences
+        Explanations for many result rows from one contribution matrix.
 
         Parameters:
         -----------
-        user_preferences : dict
-            Dictionary with user preferences for each feature.
-            Optionally include 'hostel_type': 'Gents' | 'Ladies' | 'Mixed'
-        k : int
-            Number of recommendations to return
-        show_details : bool
-            Whether to print detailed results
+        rows : np.ndarray
+            Positional row indexes into df_processed
+        prefs_scaled : np.ndarray
+            Scaled preference vector
 
         Returns:
         --------
-        pd.DataFrame : Top K recommended hostels with scores
+        list of dict : One {'top_matches', 'shortfalls'} dict per row
         """
-        user_preferences = dict(user_preferences)  # mutable copy
+        contrib = self.engine.contributions(rows, prefs_scaled)
+        # Stable sort on the negated scores keeps column order among ties
+        top_idx = np.argsort(-contrib, axis=1, kind='stable')[:, :3]
+        weak = contrib < 0.5
+
+        labels = [self.feature_labels.get(col, col) for col in self.feature_columns]
+        scores = contrib.tolist()
+
+        explanations = []
+        for i, row_scores in enumerate(scores):
+            explanations.append({
+                'top_matches': [
+                    {'feature': labels[j], 'score': row_scores[j]}
+                    for j in top_idx[i]
+                ],
+                'shortfalls': [
+                    {'feature': labels[j], 'score': row_scores[j]}
+                    for j in np.flatnonzero(weak[i])
+                ]
+            })
+        return explanations
+
+    def _build_type_partitions(self):
+        """Precompute positional row indexes for each gender/type filter"""
+        all_rows = np.arange(len(self.df_processed))
+        self.type_partitions = {None: all_rows}
+        if 'Hostel_Type' in self.df_processed.columns:
+            hostel_types = self.df_processed['Hostel_Type'].values
+            for hostel_type, allowed in self.type_filters.items():
+                self.type_partitions[hostel_type] = np.flatnonzero(
+                    np.isin(hostel_types, allowed)
+                )
+        return self.type_partitions
+
+    def _build_sorted_indexes(self):
+        """Presort each range-filter column so a filter is a binary search"""
+        self.sorted_indexes = {}
+        for col, _ in self.range_filters.values():
+            if col in self.df_processed.columns and col not in self.sorted_indexes:
+                values = self._filter_values(col, self.df_processed[col].to_numpy(dtype=np.float64))
+                # Unknown values sort as NaN, after every real value
+                order = np.argsort(values, kind='stable')
+                self.sorted_indexes[col] = (order, values[order])
+        return self.sorted_indexes
+
+    def _filter_values(self, col, values):
+        """Column values as seen by the range filters (unknown -> NaN)"""
+        unknown = self.unknown_values.get(col)
+        if unknown is None:
+            return values
+        return np.where(values == unknown, np.nan, values)
+
+    def _pop_constraints(self, user_preferences):
+        """
+        Remove hard range filters from a preference dict
 
-        # --- Hard gender/type filter ---
-        hostel_type = user_preferences.pop('hostel_type', None)
+        Returns:
+        --------
+        dict : column -> [lower bound, upper bound] (None = unbounded)
+        """
+        constraints = {}
+        for key, (col, bound) in self.range_filters.items():
+            value = user_preferences.pop(key, None)
+            if value is None or col not in self.sorted_indexes:
+                continue
+            lo_hi = constraints.setdefault(col, [None, None])
+            lo_hi[0 if bound == 'min' else 1] = float(value)
+        return constraints
+
+    def _filter_candidates(self, candidates, constraints):
+        """
+        Intersect candidate rows with every range constraint
 
-        if hostel_type and 'Hostel_Type' in self.df_processed.columns:
-            if hostel_type == 'Gents':
-                allowed = ['Gents', 'Mixed']
-            elif hostel_type == 'Ladies':
-                allowed = ['Ladies', 'Mixed']
-            else:
-                allowed = ['Gents', 'Ladies', 'Mixed']
-            valid_mask = self.df_processed['Hostel_Type'].isin(allowed)
-        else:
-            valid_mask = pd.Series([True] * len(self.df_processed),
-                                   index=self.df_processed.index)
+        Parameters:
+        -----------
+        candidates : np.ndarray
+            Sorted positional row indexes (a type partition)
+        constraints : dict
+            Output of _pop_constraints()
 
-        # --- Build user preference vector ---
-        user_prefs = pd.Series(user_preferences)
+        Returns:
+        --------
+        np.ndarray : Sorted positional row indexes satisfying all constraints
+        """
+        matches = []
+        for col, (lo, hi) in constraints.items():
+            order, sorted_values = self.sorted_indexes[col]
+            start = 0 if lo is None else np.searchsorted(sorted_values, lo, side='left')
+            # An open upper bound still stops before the unknown (NaN) tail
+            stop = np.searchsorted(sorted_values, np.inf if hi is None else hi, side='right')
+            matches.append(np.sort(order[start:stop]))
+
+        # Intersect smallest sets first so later intersections stay cheap
+        for rows in sorted(matches, key=len):
+            candidates = np.intersect1d(candidates, rows, assume_unique=True)
+            if len(candidates) == 0:
+                break
+        return candidates
+
+    def _partition_key(self, hostel_type):
+        """Map a requested hostel_type to its key in type_partitions"""
+        return hostel_type if hostel_type in self.type_partitions else None
+
+    def _top_k_frame(self, rows, distances, prefs_scaled):
+        """
+        Build the result frame for already-selected rows.
 
-        for col in self.feature_columns:
-            if col not in user_prefs.index:
-                user_prefs[col] = (
-                    self.df_processed[col].median()
-                    if col in self.df_processed.columns else 0
-                )
+        Parameters:
+        -----------
+        rows : np.ndarray
+            Positional row indexes into df_processed, best first
+        distances : np.ndarray
+            knn distance for each selected row
+        prefs_scaled : np.ndarray
+            Scaled preference vector used for the explanations
 
-        user_prefs = user_prefs[self.feature_columns]
+        Returns:
+        --------
+        pd.DataFrame : Selected hostels with knn_distance, match_score and explanation
+        """
+        top_k = self.df_processed.iloc[rows].copy()
+        top_k['knn_distance'] = distances
+        top_k['match_score'] = 1 / (1 + distances)
 
-        # Scale user preferences using the same scaler fitted on training data
-        user_prefs_array = user_prefs.values.reshape(1, -1)
+        top_k['explanation'] = self._explanations(rows, prefs_scaled)
+        return top_k
 
-        # FIX: clip values to scaler's observed min/max to avoid out-of-range warnings
-        user_prefs_array = np.clip(
-            user_prefs_array,
-            self.scaler.data_min_,
-            self.scaler.data_max_
-        )
+    def _top_k_frames(self, selections):
+        """
+        _top_k_frame() for many queries with a single row lookup.
 
-        user_prefs_scaled = pd.Series(
-            self.scaler.transform(user_prefs_array)[0],
-            index=self.feature_columns
-        )
+        Every query's rows are gathered with one iloc and explained from one
+        contribution matrix; the combined frame is then cut into per-query
+        slices.
 
-        # Inverse scaling for "lower is better" features
-        if 'Distance_from_CUSAT_km' in user_prefs_scaled.index:
-            user_prefs_scaled['Distance_from_CUSAT_km'] = (
-                1 - user_prefs_scaled['Distance_from_CUSAT_km']
-            )
+        Parameters:
+        -----------
+        selections : list of tuple
+            (rows, distances, prefs_scaled) per query, rows best first
 
-        if 'Estimated_Monthly_Rent' in user_prefs_scaled.index:
-            user_prefs_scaled['Estimated_Monthly_Rent'] = (
-                1 - user_prefs_scaled['Estimated_Monthly_Rent']
-            )
+        Returns:
+        --------
+        list of pd.DataFrame : One result frame per selection, in order
+        """
+        if not selections:
+            return []
+        counts = [len(rows) for rows, _, _ in selections]
+        rows = np.concatenate([rows for rows, _, _ in selections])
+        distances = np.concatenate([dist for _, dist, _ in selections])
+        # One preference vector per result row, so each row is explained
+        # against its own query
+        prefs_scaled = np.repeat(np.vstack([prefs for _, _, prefs in selections]), counts, axis=0)
+
+        top_k = self.df_processed.iloc[rows].copy()
+        top_k['knn_distance'] = distances
+        top_k['match_score'] = 1 / (1 + distances)
+        top_k['explanation'] = self._explanations(rows, prefs_scaled)
+
+        bounds = np.cumsum([0] + counts)
+        return [top_k.iloc[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])]
+
+    def recommend_many(self, list_of_prefs, k=5, chunk_size=None):
+        """
+        Recommend top K hostels for many preference dicts at once
+
+        Queries are scored against the catalog as a (queries x hostels)
+        distance matrix, processed in chunks so peak memory stays bounded.
+
+        Parameters:
+        -----------
+        list_of_prefs : list of dict
+            Preference dicts in the same format accepted by recommend()
+        k : int
+            Number of recommendations per query
+        chunk_size : int, optional
+            Queries scored per matrix block; by default sized so a block
+            holds about 4M distances
 
-        # --- Calculate distances ---
-        distances = self.calculate_weighted_distance(user_prefs_scaled)
+        Returns:
+        --------
+        list of pd.DataFrame : One result frame per query, in input order
+        """
+        list_of_prefs = [dict(prefs) for prefs in list_of_prefs]
+        with self._lock.read():
+            n_rows = len(self.df_processed)
+            if chunk_size is None:
+                chunk_size = max(1, self.batch_chunk_elements // max(n_rows, 1))
+
+            # Group queries by type partition so each block scores only its rows;
+            # queries with range filters are grouped by partition and filters, so
+            # every group shares one candidate set and one distance block
+            groups = {}
+            filtered_groups = {}
+            results = [None] * len(list_of_prefs)
+            # (query id, (rows, distances, prefs_scaled)) for every non-empty result
+            selected = []
+            for i, prefs in enumerate(list_of_prefs):
+                key = self._partition_key(prefs.pop('hostel_type', None))
+                constraints = self._pop_constraints(prefs)
+                if constraints:
+                    signature = (key, tuple(sorted((col, tuple(lo_hi)) for col, lo_hi in constraints.items())))
+                    filtered_groups.setdefault(signature, (constraints, []))[1].append(i)
+                else:
+                    groups.setdefault(key, []).append(i)
+
+            for key, query_ids in groups.items():
+                prefs_scaled = np.vstack([
+                    self.engine.scale_preferences(list_of_prefs[q]) for q in query_ids
+                ])
+                with metrics.timer('recommender.knn_batch'):
+                    neighbours = self.index.query_many(prefs_scaled, key, k, chunk_size)
+
+                for i, q in enumerate(query_ids):
+                    rows, row_dist = neighbours[i]
+                    if len(rows):
+                        selected.append((q, (rows, row_dist, prefs_scaled[i])))
+                    else:
+                        results[q] = pd.DataFrame()
+
+            for (key, _), (constraints, query_ids) in filtered_groups.items():
+                with metrics.timer('recommender.filter'):
+                    candidates = self._filter_candidates(self.type_partitions[key], constraints)
+                top_k = min(k, len(candidates))
+                if top_k == 0:
+                    for q in query_ids:
+                        results[q] = pd.DataFrame()
+                    continue
+
+                prefs_scaled = np.vstack([
+                    self.engine.scale_preferences(list_of_prefs[q]) for q in query_ids
+                ])
+                block_size = max(1, self.batch_chunk_elements // len(candidates))
+                with metrics.timer('recommender.knn_batch'):
+                    neighbours = []
+                    for start in range(0, len(query_ids), block_size):
+                        distances = self.engine.distances_many(
+                            prefs_scaled[start:start + block_size], candidates
+                        )
+                        neighbours.extend(select_top_k(row_dist, candidates, top_k)
+                                          for row_dist in distances)
+
+                for i, q in enumerate(query_ids):
+                    rows, row_dist = neighbours[i]
+                    selected.append((q, (rows, row_dist, prefs_scaled[i])))
+
+            # One row lookup and one contribution matrix for every query
+            with metrics.timer('recommender.explain_batch'):
+                frames = self._top_k_frames([selection for _, selection in selected])
+            for (q, _), frame in zip(selected, frames):
+                results[q] = frame
+            return results
+
+    def _recommend_one(self, user_preferences, k, exact=False):
+        """Filter, score and explain one query; empty frame if nothing matches"""
+        rows, top_dist, prefs_scaled, _ = self._nearest(user_preferences, k, exact)
+        if len(rows) == 0:
+            return pd.DataFrame()
 
-        results = self.df_processed.copy()
-        results['knn_distance'] = distances
+        # --- Attach scores and explanations ---
+        with metrics.timer('recommender.explain'):
+            return self._top_k_frame(rows, top_dist, prefs_scaled)
 
-        # Apply gender/type filter
-        results = results[valid_mask].copy()
+    def _nearest(self, user_preferences, k, exact=False):
+        """
+        Filter and score one query
 
-        # FIX: guard against k being larger than the filtered result set
-        k = min(k, len(results))
+        Returns:
+        --------
+        tuple : (rows, distances, prefs_scaled, number of rows passing the
+            filters); no rows and prefs_scaled None if nothing matches
+        """
+        # --- Hard gender/type filter ---
+        hostel_type = user_preferences.pop('hostel_type', None)
+        key = self._partition_key(hostel_type)
+        candidates = self.type_partitions[key]
+
+        # --- Hard range filters (rent, distance, safety, rating) ---
+        constraints = self._pop_constraints(user_preferences)
+        if constraints:
+            with metrics.timer('recommender.filter'):
+                candidates = self._filter_candidates(candidates, constraints)
+
+        k = min(k, len(candidates))
         if k == 0:
-            print("[WARN] No hostels matched the hostel_type filter.")
-            return pd.DataFrame()
+            return candidates[:0], np.empty(0), None, 0
 
-        results['match_score'] = 1 / (1 + results['knn_distance'])
+        # --- Build and scale user preference vector ---
+        with metrics.timer('recommender.scale'):
+            prefs_scaled = self.engine.scale_preferences(user_preferences)
 
-        top_k = results.nsmallest(k, 'knn_distance').copy()
+        # --- Nearest neighbours among the surviving candidates ---
+        with metrics.timer('recommender.knn'):
+            if constraints:
+                distances = self.engine.distances(prefs_scaled, candidates)
+                rows, top_dist = select_top_k(distances, candidates, k)
+            else:
+                index = self.exact_index if exact else self.index
+                rows, top_dist = index.query(prefs_scaled, key, k)
+        return rows, top_dist, prefs_scaled, len(candidates)
 
-        # Attach explanations
-        top_k['explanation'] = [
-            self.get_explanation(row, user_prefs_scaled)
-            for _, row in top_k.iterrows()
-        ]
+    def recommend(self, user_preferences, k=5, show_details=True, exact=False):
+        """
+        Recommend top K hostels based on user preferences
+
+        Parameters:
+        -----------
+        user_preferences : dict
+            Dictionary with user preferences for each feature.
+            Optionally include 'hostel_type': 'Gents' | 'Ladies' | 'Mixed'
+            and the hard filters 'rent_min', 'rent_max', 'max_distance',
+            'min_safety', 'min_rating' (None = no bound)
+        k : int
+            Number of recommendations to return
+        show_details : bool
+            Whether to print detailed results
+        exact : bool
+            Force the brute-force scan instead of the configured index
+
+        Returns:
+        --------
+        pd.DataFrame : Top K recommended hostels with scores
+        """
+        user_preferences = dict(user_preferences)  # mutable copy
+
+        with self._lock.read():
+            top_k = self._recommend_one(user_preferences, k, exact)
+
+        # FIX: guard against k being larger than the filtered result set
+        k = len(top_k)
+        if k == 0:
+            print("[WARN] No hostels matched the hostel_type and range filters.")
+            return top_k
 
         if show_details:
             print(f"\n{'='*80}")
@@ -324,6 +1514,92 @@ class HostelRecommender:
 
         return top_k
 
+    def rank(self, user_preferences):
+        """
+        Score every hostel passing the filters, for paging through results
+
+        Runs the same filters and distance as recommend(), but keeps all
+        candidates instead of the top K; page() then builds result frames
+        (with explanations) for one slice of the ranking at a time.
+
+        Parameters:
+        -----------
+        user_preferences : dict
+            Preferences in the format accepted by recommend()
+
+        Returns:
+        --------
+        RankedList : All surviving candidates, ordered lazily by distance
+        """
+        user_preferences = dict(user_preferences)  # mutable copy
+
+        with self._lock.read():
+            key = self._partition_key(user_preferences.pop('hostel_type', None))
+            candidates = self.type_partitions[key]
+            constraints = self._pop_constraints(user_preferences)
+            if constraints:
+                with metrics.timer('recommender.filter'):
+                    candidates = self._filter_candidates(candidates, constraints)
+
+            with metrics.timer('recommender.scale'):
+                prefs_scaled = self.engine.scale_preferences(user_preferences)
+            with metrics.timer('recommender.rank'):
+                distances = self.engine.distances(prefs_scaled, candidates)
+            return RankedList(candidates, distances, prefs_scaled, self.catalog_version)
+
+    def shortlist(self, user_preferences, k=5):
+        """
+        The first K entries of rank(), found like recommend() does
+
+        Most paged result lists are never read past the first page, so this
+        answers it through the configured index instead of scoring and
+        ordering every hostel; only later pages need rank().
+
+        Parameters:
+        -----------
+        user_preferences : dict
+            Preferences in the format accepted by recommend()
+        k : int
+            Number of hostels to keep
+
+        Returns:
+        --------
+        tuple : (RankedList of at most K hostels for page(), number of
+            hostels passing the filters)
+        """
+        user_preferences = dict(user_preferences)  # mutable copy
+
+        with self._lock.read():
+            rows, distances, prefs_scaled, total = self._nearest(user_preferences, k)
+            return RankedList(rows, distances, prefs_scaled, self.catalog_version), total
+
+    def page(self, ranking, start, stop):
+        """
+        Result frame for positions start..stop-1 of a rank() result
+
+        Raises ValueError if the catalog changed since the ranking was
+        computed, because its row positions no longer match.
+
+        Parameters:
+        -----------
+        ranking : RankedList
+            Output of rank() or shortlist() for the current catalog
+        start, stop : int
+            Slice of the ranking to return
+
+        Returns:
+        --------
+        pd.DataFrame : The hostels in that slice, like recommend()'s frame
+        """
+        with self._lock.read():
+            if ranking.catalog_version != self.catalog_version:
+                raise ValueError("Ranking is stale: the catalog changed since it was computed")
+            rows, distances = ranking.slice(start, stop)
+            if len(rows) == 0:
+                return pd.DataFrame()
+            with metrics.timer('recommender.explain'):
+                return self._top_k_frame(rows, distances, ranking.prefs_scaled)
+
     def interactive_recommend(self):
         """Interactive recommendation with user input"""
         print("\n" + "="*80)
@@ -379,14 +1655,142 @@ class HostelRecommender:
         return recommendations
 
 
+class ArtifactStore:
+    """
+    Versioned artifacts shared by several processes (e.g. uvicorn workers).
+
+    Layout of the store directory:
+        v000001/, v000002/, ...   artifacts written by export_artifact()
+        CURRENT                   name of the version processes should use
+        .lock                     held while building or publishing
+
+    The first process to take the lock builds the model and publishes it;
+    every process then memory-maps the published version read-only, so the
+    operating system keeps one copy of the arrays in the page cache no matter
+    how many workers attach. Publishing writes a new version directory and
+    then replaces CURRENT atomically, so readers see either the old or the
+    new catalog, never a partial one.
+    """
+
+    CURRENT = 'CURRENT'
+    VERSION_PATTERN = re.compile(r'^v(\d+)$')
+
+    def __init__(self, root, keep=3):
+        """
+        Parameters:
+        -----------
+        root : str
+            Store directory (created on demand)
+        keep : int
+            Number of most recent versions kept on disk; older ones are
+            removed after a publish (mapped files stay valid until unmapped)
+        """
+        self.root = root
+        self.keep = max(1, keep)
+        self._thread_lock = threading.Lock()
+
+    @contextmanager
+    def lock(self):
+        """Exclusive lock across processes (and threads) for build/publish"""
+        os.makedirs(self.root, exist_ok=True)
+        with self._thread_lock, open(os.path.join(self.root, '.lock'), 'a') as handle:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def path(self, version):
+        return os.path.join(self.root, version)
+
+    def current_version(self):
+        """Published version name, or None if nothing was published yet"""
+        try:
+            with open(os.path.join(self.root, self.CURRENT)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _versions(self):
+        """Version directory names, oldest first"""
+        if not os.path.isdir(self.root):
+            return []
+        found = []
+        for name in os.listdir(self.root):
+            match = self.VERSION_PATTERN.match(name)
+            if match and os.path.isdir(self.path(name)):
+                found.append((int(match.group(1)), name))
+        return [name for _, name in sorted(found)]
+
+    def publish(self, recommender):
+        """
+        Export the recommender as a new version and make it current
+
+        Callers must hold lock(). Returns the new version name.
+        """
+        versions = self._versions()
+        number = int(self.VERSION_PATTERN.match(versions[-1]).group(1)) + 1 if versions else 1
+        version = f'v{number:06d}'
+        recommender.export_artifact(self.path(version))
+
+        tmp_path = os.path.join(self.root, f'{self.CURRENT}.tmp-{os.getpid()}')
+        with open(tmp_path, 'w') as f:
+            f.write(version)
+        os.replace(tmp_path, os.path.join(self.root, self.CURRENT))
+
+        for old in self._versions()[:-self.keep]:
+            if old != version:
+                shutil.rmtree(self.path(old), ignore_errors=True)
+        print(f"[OK] Published catalog version {version}")
+        return version
+
+    def load_or_build(self, recommender):
+        """
+        Attach to the current version, building and publishing it first if
+        it is missing or stale. Returns the version name that was loaded.
+        """
+        with self.lock():
+            version = self.current_version()
+            if version is None or not recommender.artifact_is_current(self.path(version)):
+                recommender.load_data()
+                recommender.preprocess_data()
+                recommender.prepare_features()
+                version = self.publish(recommender)
+        # The builder re-attaches too, so it shares the mapped pages as well
+        recommender.load_artifact(self.path(version))
+        return version
+
+
 def main():
     """Main execution function"""
-    recommender = HostelRecommender()
+    parser = argparse.ArgumentParser(description="KNN hostel recommender for CUSAT")
+    parser.add_argument('--data', default='CUSAT_Private_Hostels_ML_Updated.xlsx',
+                        help="Excel file with hostel data")
+    parser.add_argument('--export', metavar='ARTIFACT_DIR',
+                        help="fit the model, write a compiled artifact and exit")
+    parser.add_argument('--publish', metavar='STORE_DIR',
+                        help="fit the model, publish it as a new version of a shared "
+                             "artifact store (see ArtifactStore) and exit")
+    args = parser.parse_args()
+
+    recommender = HostelRecommender(data_path=args.data)
 
     recommender.load_data()
     recommender.preprocess_data()
     recommender.prepare_features()
 
+    if args.export:
+        recommender.export_artifact(args.export)
+        return
+
+    if args.publish:
+        store = ArtifactStore(args.publish)
+        with store.lock():
+            store.publish(recommender)
+        return
+
     print("\n" + "="*80)
     print("KNN Model Ready!")
     print("="*80)
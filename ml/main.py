@@ -6,33 +6,523 @@ extractor so the frontend can call it over HTTP.
 
 Usage:
     uvicorn main:app --reload --port 8000
+
+Endpoints:
+    GET  /health           liveness (process is up)
+    GET  /ready            readiness (model loaded and warmed up)
+    GET  /cache/stats      response and extraction cache hit/miss counters
+    GET  /metrics          per-stage latency histograms and counters (Prometheus text)
+    POST /recommend        one natural-language query (multi-turn with sessionId)
+    POST /recommend/next   next page of a /recommend result list (cursor)
+    POST /recommend/stream /recommend as NDJSON or SSE events, one hostel at a time
+    POST /recommend/batch  many queries scored in a single vectorized pass
+    PUT  /admin/hostels/{id}     insert/update a hostel without a refit
+    DELETE /admin/hostels/{id}   remove a hostel without a refit
+    DELETE /sessions/{id}        forget a chat session's preferences
+
+The model loads in the background at startup; until /ready reports ready,
+model endpoints wait up to ML_READY_TIMEOUT seconds and then return 503.
+Admin endpoints require the X-Admin-Token header to match ML_ADMIN_TOKEN.
+Requests carrying a sessionId are merged over that session's earlier
+preferences; sessions idle for ML_SESSION_TTL seconds are dropped.
+With ML_SHARED_MODEL=1 (for `uvicorn --workers N`) one process builds the
+model into the versioned store at ML_ARTIFACT_STORE and every worker
+memory-maps it read-only; catalog updates are published as new versions that
+all workers switch to within ML_RELOAD_INTERVAL seconds.
+/recommend, /recommend/stream, /recommend/next and /recommend/batch score on
+ML_MODEL_WORKERS dedicated threads; identical in-flight work is shared, and
+once ML_MAX_QUEUE more jobs are waiting, new requests get an immediate 429.
+A /recommend/batch request holds at most ML_MAX_BATCH texts (422 above).
+/recommend finds the first k through the configured index and returns them
+with a cursor; the first /recommend/next ranks every matching hostel once and
+later pages reuse that cached ranking, explaining only the rows of each page.
+Rankings live ML_RANKING_TTL seconds after their last use, within
+ML_RANKING_MAX_MB of memory. Cursors carry the query, so a worker
+without the ranking (expired, or ranked by another worker) ranks it again.
+With ML_SHARED_MODEL they are valid on every worker until the catalog
+changes; otherwise each worker has its own catalog and cursors need sticky
+routing. A cursor for an older catalog gets a 410.
+/recommend/stream sends the "understood" summary as soon as the query is
+ranked, then each hostel as soon as its explanation is built, then "done";
+a client that disconnects stops the remaining work.
+/metrics records per-stage latencies of the extractor, recommender and API,
+request and error counts, catalog size and cache statistics; ML_METRICS=0
+turns collection off.
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import BackgroundTasks, Depends, FastAPI, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
 from typing import Optional, List
-import os, sys, traceback
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+import asyncio, base64, hashlib, json, os, secrets, sys, threading, time, traceback
+
+try:  # optional, several times faster JSON encoding for responses
+    import orjson
+except ImportError:
+    orjson = None
 
 # ── import the existing ML modules ────────────────────────────────────────────
 sys.path.insert(0, os.path.dirname(__file__))
-from knn_hostel_model import HostelRecommender
+from knn_hostel_model import ArtifactStore, HostelRecommender
 from enhanced_preference_extraction import EnhancedPreferenceExtractor
+import metrics
 
-# ── Boot-time model loading (once) ────────────────────────────────────────────
+# ── Configuration ─────────────────────────────────────────────────────────────
 DATA_PATH = os.path.join(os.path.dirname(__file__), "CUSAT_Private_Hostels_ML_Updated.xlsx")
+# Compiled artifact (see HostelRecommender.export_artifact); rebuilt from the
+# Excel file automatically whenever it is missing or stale
+ARTIFACT_PATH = os.environ.get(
+    "ML_ARTIFACT_PATH", os.path.join(os.path.dirname(__file__), "hostel_model.artifact")
+)
+# Shared mode for `uvicorn --workers N`: workers attach to one memory-mapped,
+# versioned artifact store instead of each loading its own copy, and follow
+# new versions published by catalog updates (checked every RELOAD_INTERVAL s)
+SHARED_MODEL = os.environ.get("ML_SHARED_MODEL", "0") == "1"
+ARTIFACT_STORE = os.environ.get(
+    "ML_ARTIFACT_STORE", os.path.join(os.path.dirname(__file__), "hostel_model.store")
+)
+RELOAD_INTERVAL = float(os.environ.get("ML_RELOAD_INTERVAL", "5"))
+# Seconds a request waits for the model during warm-up before getting a 503
+READY_TIMEOUT = float(os.environ.get("ML_READY_TIMEOUT", "2"))
+# Run representative queries after loading so first requests skip first-call costs
+PREWARM = os.environ.get("ML_PREWARM", "1") != "0"
+
+# Shared secret for the /admin endpoints (X-Admin-Token header); unset disables them
+ADMIN_TOKEN = os.environ.get("ML_ADMIN_TOKEN")
+# Re-export the artifact after admin updates so restarts keep the changes
+PERSIST_UPDATES = os.environ.get("ML_PERSIST_UPDATES", "1") != "0"
+
+# Response cache bounds (entries / seconds); ML_CACHE_SIZE=0 disables caching
+CACHE_SIZE = int(os.environ.get("ML_CACHE_SIZE", "1024"))
+CACHE_TTL = float(os.environ.get("ML_CACHE_TTL", "300"))
+
+# Memoized extractions for repeated messages (chat retries, resubmits); 0 disables
+EXTRACT_CACHE_SIZE = int(os.environ.get("ML_EXTRACT_CACHE_SIZE", "4096"))
+
+# Chat sessions: max tracked sessions / idle seconds before a session is dropped
+SESSION_MAX = int(os.environ.get("ML_SESSION_MAX", "10000"))
+SESSION_TTL = float(os.environ.get("ML_SESSION_TTL", "1800"))
+
+# Ranked lists behind /recommend cursors: idle seconds / total memory budget
+RANKING_TTL = float(os.environ.get("ML_RANKING_TTL", "600"))
+RANKING_MAX_MB = float(os.environ.get("ML_RANKING_MAX_MB", "64"))
+
+# Threads that run /recommend scoring, and how many more distinct queries may
+# wait for them before new ones are turned away with a 429
+MODEL_WORKERS = int(os.environ.get("ML_MODEL_WORKERS", str(min(4, os.cpu_count() or 1))))
+MAX_QUEUE = int(os.environ.get("ML_MAX_QUEUE", "64"))
+
+# Most texts accepted by one /recommend/batch request
+MAX_BATCH = int(os.environ.get("ML_MAX_BATCH", "100"))
+
+PREWARM_QUERIES = [
+    "gents hostel near cusat under 5k with wifi",
+    "ladies hostel within 2 km, budget between 3000 and 6000, very safe",
+    "cheap mixed hostel with good food and cctv",
+    "hostel with rating above 4",
+]
+
+
+# ── Model state (loaded in the background at startup) ─────────────────────────
+class ModelState:
+    def __init__(self):
+        self.recommender: Optional[HostelRecommender] = None
+        self.extractor: Optional[EnhancedPreferenceExtractor] = None
+        self.status = "starting"  # starting → loading → warming → ready | failed
+        self.error: Optional[str] = None
+        self.loaded_at: Optional[float] = None
+        self.generation = 0  # bumped every time a model is (re)loaded
+        self.artifact_version: Optional[str] = None  # shared mode: store version in use
+        self.ready = threading.Event()
+
+
+state = ModelState()
+store = ArtifactStore(ARTIFACT_STORE) if SHARED_MODEL else None
+
+
+# ── Response cache ────────────────────────────────────────────────────────────
+class TTLCache:
+    """Thread-safe LRU cache with a per-entry time-to-live and hit/miss counters."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = None
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def sync_version(self, version):
+        """Drop every entry when the model or catalog version changes."""
+        with self._lock:
+            if version != self._version:
+                self._data.clear()
+                self._version = version
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, version=None):
+        """Store a value; skipped when it was computed for a version that is no longer current."""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            if version is not None and version != self._version:
+                return
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "version": self._version,
+            }
+
+
+response_cache = TTLCache(CACHE_SIZE, CACHE_TTL)
 
-recommender = HostelRecommender(data_path=DATA_PATH)
-recommender.load_data()
-recommender.preprocess_data()
-recommender.prepare_features()
 
-extractor = EnhancedPreferenceExtractor()
+class SessionStore:
+    """
+    Per-chat preference state keyed by session id.
+
+    Each message's extracted delta is merged over the session's preferences,
+    so follow-ups ("actually make it ladies only") keep earlier constraints
+    without re-parsing the transcript. Sessions are dropped after `idle_ttl`
+    seconds without a message, or least-recently-used beyond `maxsize`.
+    """
+
+    def __init__(self, maxsize: int, idle_ttl: float):
+        self.maxsize = maxsize
+        self.idle_ttl = idle_ttl
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def _evict(self, now: float):
+        # Least recently used first, so stop at the first live session
+        while self._data:
+            session_id, session = next(iter(self._data.items()))
+            if session["touchedAt"] + self.idle_ttl >= now and len(self._data) <= self.maxsize:
+                break
+            del self._data[session_id]
+            self.evictions += 1
+
+    def merge(self, session_id: str, delta: dict, defaults: dict) -> dict:
+        """Apply a message's delta and return a copy of the merged preferences."""
+        with self._lock:
+            now = time.monotonic()
+            session = self._data.pop(session_id, None)
+            self._evict(now)
+            if session is None:
+                session = {"prefs": dict(defaults), "responseKey": None, "response": None}
+            session["prefs"].update(delta)
+            session["touchedAt"] = now
+            self._data[session_id] = session
+            self._evict(now)
+            return dict(session["prefs"])
+
+    def last_response(self, session_id: str, key):
+        """The session's previous response if it was built for the same key."""
+        with self._lock:
+            session = self._data.get(session_id)
+            if session is not None and session["responseKey"] == key:
+                return session["response"]
+            return None
+
+    def remember(self, session_id: str, key, response):
+        with self._lock:
+            session = self._data.get(session_id)
+            if session is not None:
+                session["responseKey"], session["response"] = key, response
+
+    def drop(self, session_id: str) -> bool:
+        with self._lock:
+            return self._data.pop(session_id, None) is not None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "idleTtl": self.idle_ttl,
+                "evictions": self.evictions,
+            }
+
+
+sessions = SessionStore(SESSION_MAX, SESSION_TTL)
+
+
+class RankingCache:
+    """
+    Full ranked candidate lists behind /recommend cursors.
+
+    Bounded by the total size of the ranking arrays (least recently used
+    dropped first) and by an idle time-to-live that every page read renews,
+    so browsing deep into a result list never re-scores the catalog.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.nbytes = 0
+        self.hits = self.misses = self.evictions = 0
+
+    def _drop(self, key):
+        _, ranking = self._data.pop(key)
+        self.nbytes -= ranking.nbytes
+
+    def put(self, key, ranking):
+        if ranking.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self._drop(key)
+            self._data[key] = (time.monotonic() + self.ttl, ranking)
+            self.nbytes += ranking.nbytes
+            while self.nbytes > self.max_bytes:
+                self._drop(next(iter(self._data)))
+                self.evictions += 1
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._drop(key)
+                self.misses += 1
+                return None
+            ranking = entry[1]
+            self._data[key] = (time.monotonic() + self.ttl, ranking)
+            self._data.move_to_end(key)
+            self.hits += 1
+            return ranking
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "bytes": self.nbytes,
+                "maxBytes": self.max_bytes,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+rankings = RankingCache(int(RANKING_MAX_MB * (1 << 20)), RANKING_TTL)
+
+
+def encode_cursor(version: str, key: str, offset: int, k: int, prefs: dict) -> str:
+    """
+    Opaque page token: which catalog and cached ranking, where the next page
+    starts, page size, and the preferences to rank again on a cache miss.
+    """
+    raw = json.dumps([version, key, offset, k, prefs], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        version, key, offset, k, prefs = json.loads(raw)
+        if not (isinstance(version, str) and isinstance(key, str)
+                and isinstance(offset, int) and isinstance(k, int) and offset >= 0
+                and isinstance(prefs, dict)):
+            raise ValueError(cursor)
+        for name, value in prefs.items():
+            if not (value is None or isinstance(value, (int, float))
+                    or (name == "hostel_type" and isinstance(value, str))):
+                raise ValueError(cursor)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Malformed cursor")
+    return version, key, offset, k, prefs
+
+
+def model_version(recommender: HostelRecommender) -> str:
+    return f"{state.generation}.{recommender.catalog_version}"
+
+
+def catalog_id(recommender: HostelRecommender) -> str:
+    """
+    Catalog a cursor belongs to. In shared mode this is the store version
+    every worker maps, so the cursor is valid on any of them; otherwise it is
+    this process's model version.
+    """
+    return state.artifact_version or model_version(recommender)
+
+
+def cache_key(prefs: dict, k: int) -> str:
+    """Canonical hash of the extracted preferences and k."""
+    canonical = json.dumps(prefs, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(f"{k}|{canonical}".encode()).hexdigest()
+
+
+def load_model():
+    """Fit or load the recommender, optionally pre-warm it, then mark ready."""
+    started = time.perf_counter()
+    try:
+        state.status = "loading"
+        recommender = HostelRecommender(data_path=DATA_PATH)
+        if store is not None:
+            state.artifact_version = store.load_or_build(recommender)
+        else:
+            recommender.load_or_build(ARTIFACT_PATH)
+        extractor = EnhancedPreferenceExtractor(
+            cache_size=EXTRACT_CACHE_SIZE, features=recommender.binary_columns
+        )
+
+        if PREWARM:
+            state.status = "warming"
+            all_prefs = [extractor.extract_and_validate(text)[0] for text in PREWARM_QUERIES]
+            for prefs in all_prefs:
+                # The paths of /recommend (shortlist) and /recommend/next (full ranking)
+                recommender.page(recommender.shortlist(prefs, 5)[0], 0, 5)
+                recommender.page(recommender.rank(prefs), 5, 10)
+            recommender.recommend_many([prefs.copy() for prefs in all_prefs], k=5)
+
+        state.recommender, state.extractor = recommender, extractor
+        state.generation += 1
+        state.loaded_at = time.time()
+        state.status = "ready"
+        state.ready.set()
+        print(f"\n✅  ML model ready in {time.perf_counter() - started:.2f}s — "
+              "listening for /recommend requests\n")
+
+        if store is not None and RELOAD_INTERVAL > 0:
+            threading.Thread(target=watch_store, name="artifact-watcher", daemon=True).start()
+    except Exception as exc:
+        traceback.print_exc()
+        metrics.inc("ml_errors_total", "Unhandled errors by endpoint", endpoint="load_model",
+                    error=type(exc).__name__)
+        state.status = "failed"
+        state.error = str(exc)
+
+
+def attach_version(version: str) -> HostelRecommender:
+    """Shared mode: memory-map a published store version and serve it."""
+    recommender = HostelRecommender(data_path=DATA_PATH)
+    recommender.load_artifact(store.path(version))
+    # Single reference swap; in-flight requests finish on the previous model
+    state.recommender = recommender
+    state.artifact_version = version
+    state.generation += 1
+    return recommender
+
+
+def watch_store():
+    """Shared mode: switch to newly published catalog versions."""
+    while True:
+        time.sleep(RELOAD_INTERVAL)
+        try:
+            if store.current_version() in (None, state.artifact_version):
+                continue
+            with store.lock():
+                version = store.current_version()
+                if version and version != state.artifact_version:
+                    attach_version(version)
+                    print(f"[OK] Switched to catalog version {version}")
+        except Exception:
+            traceback.print_exc()
+
+
+def update_catalog(mutate):
+    """
+    Apply mutate(recommender) to the serving catalog.
+
+    In shared mode the update runs under the store lock on top of the latest
+    published version and is published as a new one, so concurrent updates
+    from different workers never overwrite each other.
+    """
+    recommender, _ = require_model()
+    if store is None:
+        return recommender, mutate(recommender)
+    with store.lock():
+        current = store.current_version()
+        if current and current != state.artifact_version:
+            recommender = attach_version(current)
+        result = mutate(recommender)
+        # Re-attach so this worker shares the mapped pages like the others
+        recommender = attach_version(store.publish(recommender))
+    return recommender, result
+
+
+def require_model():
+    """Return (recommender, extractor), waiting briefly during warm-up."""
+    if state.status != "failed" and state.ready.wait(READY_TIMEOUT):
+        return state.recommender, state.extractor
+    raise HTTPException(
+        status_code=503,
+        detail=f"ML model is not ready ({state.status})",
+        headers={"Retry-After": "5"},
+    )
+
+
+async def require_model_async():
+    """require_model() that never blocks the event loop while the model loads."""
+    if state.ready.is_set():
+        return state.recommender, state.extractor
+    return await asyncio.get_running_loop().run_in_executor(None, require_model)
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin API is disabled (set ML_ADMIN_TOKEN)")
+    if not secrets.compare_digest(x_admin_token or "", ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+def persist_catalog(recommender: HostelRecommender):
+    try:
+        recommender.export_artifact(ARTIFACT_PATH)
+    except OSError:
+        traceback.print_exc()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Scoring threads belong to this app run, so a restarted app gets fresh ones
+    app.state.model_executor = ThreadPoolExecutor(max_workers=MODEL_WORKERS, thread_name_prefix="model")
+    # Load in a worker thread so the server accepts connections immediately
+    app.state.model_loader = asyncio.get_running_loop().run_in_executor(None, load_model)
+    yield
+    app.state.model_executor.shutdown(wait=False, cancel_futures=True)
 
-print("\n✅  ML model ready — listening for /recommend requests\n")
 
 # ── App setup ─────────────────────────────────────────────────────────────────
-app = FastAPI(title="Havenly ML API", version="1.0.0")
+app = FastAPI(title="Havenly ML API", version="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -42,10 +532,47 @@ app.add_middleware(
 )
 
 
+class RequestMetricsMiddleware:
+    """Count and time HTTP requests per route template and status code."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = 500  # reported if the app fails before starting a response
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # Label by route template (/sessions/{session_id}), never the raw path
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            metrics.observe("ml_request_seconds", "HTTP request latency by route",
+                            time.perf_counter() - started, path=path)
+            metrics.inc("ml_requests_total", "HTTP requests by route, method and status",
+                        path=path, method=scope["method"], status=status)
+
+
+if metrics.ENABLED:
+    app.add_middleware(RequestMetricsMiddleware)
+
+
 # ── Schemas ───────────────────────────────────────────────────────────────────
 class RecommendRequest(BaseModel):
     text: str
     k: Optional[int] = 5
+    # Chat session to merge this message into; omit for a one-off query
+    sessionId: Optional[str] = Field(None, max_length=128)
 
 
 class HostelResult(BaseModel):
@@ -65,6 +592,336 @@ class RecommendResponse(BaseModel):
     understood: str
     results: List[HostelResult]
     preferences: dict
+    # Token for /recommend/next (None on the last page) and number of ranked matches
+    cursor: Optional[str] = None
+    total: Optional[int] = None
+
+
+class NextPageRequest(BaseModel):
+    cursor: str
+    # Page size; defaults to the size of the page the cursor came from
+    k: Optional[int] = None
+
+
+class RecommendPage(BaseModel):
+    results: List[HostelResult]
+    cursor: Optional[str] = None
+    total: int
+
+
+class HostelUpsert(BaseModel):
+    """Raw hostel fields in the Excel catalog schema; omitted fields keep their value."""
+    Name: Optional[str] = None
+    Address: Optional[str] = None
+    Hostel_Type: Optional[str] = None
+    Rating: Optional[float] = None
+    Rating_Count: Optional[float] = None
+    Distance_from_CUSAT_km: Optional[float] = None
+    Latitude: Optional[float] = None
+    Longitude: Optional[float] = None
+    WiFi_Available: Optional[int] = None
+    Food_Available: Optional[int] = None
+    AC_Available: Optional[int] = None
+    Parking_Available: Optional[int] = None
+    Laundry_Available: Optional[int] = None
+    CCTV_Security: Optional[int] = None
+    Is_Clean: Optional[int] = None
+    Open_24x7: Optional[int] = None
+    Estimated_Monthly_Rent: Optional[float] = None
+    Safety_Score: Optional[float] = None
+    Food_Quality_Score: Optional[float] = None
+
+
+class BatchRecommendRequest(BaseModel):
+    texts: List[str] = Field(..., max_length=MAX_BATCH)
+    k: Optional[int] = 5
+
+
+class BatchRecommendResponse(BaseModel):
+    results: List[RecommendResponse]
+
+
+# ── Helpers ───────────────────────────────────────────────────────────────────
+NO_MATCH_MESSAGE = "I couldn't find hostels matching those criteria. Try relaxing your filters."
+
+
+def clamp_k(k: Optional[int]) -> int:
+    return max(1, min(k or 5, 10))
+
+
+def build_understood(prefs: dict) -> str:
+    """Build the human-readable "understood" summary for extracted preferences."""
+    parts = []
+    if prefs.get("hostel_type"):
+        parts.append(f"type: **{prefs['hostel_type']}**")
+    if prefs.get("Distance_from_CUSAT_km"):
+        parts.append(f"within **{prefs['Distance_from_CUSAT_km']} km**")
+    if prefs.get("Estimated_Monthly_Rent"):
+        val = int(prefs["Estimated_Monthly_Rent"])
+        parts.append(f"budget **₹{val:,}**")
+    if prefs.get("Safety_Score"):
+        parts.append(f"safety **{prefs['Safety_Score']}+**")
+
+    return (
+        f"I understood: {', '.join(parts)}. Here are my top picks:"
+        if parts
+        else "Here are some top-rated hostels for you:"
+    )
+
+
+def serialize_results(results_df) -> List[dict]:
+    """
+    Convert a recommender result frame into HostelResult-shaped dicts.
+
+    Works column by column (one .tolist() per field) instead of boxing every
+    row into a Series; the output matches the HostelResult schema.
+    """
+    n = len(results_df)
+
+    def column(name, default=None) -> list:
+        return results_df[name].tolist() if name in results_df.columns else [default] * n
+
+    def floats(name) -> list:
+        return [None if value is None else float(value) for value in column(name)]
+
+    ids = [int(value) if value else None for value in column("ID")]
+    names = [str(value) for value in column("Name", "Unknown")]
+    types = [str(value).strip() or None for value in column("Hostel_Type", "")]
+    addresses = [str(value) or None for value in column("Address", "")]
+    # match_score is 0-1 from the model; convert to 0-100 %
+    scores = [float(round(float(value) * 100)) for value in column("match_score", 0.5)]
+    top_matches = [
+        explanation.get("top_matches", []) if isinstance(explanation, dict) else []
+        for explanation in column("explanation", {})
+    ]
+
+    fields = {
+        "id": ids,
+        "name": names,
+        "hostelType": types,
+        "distance": floats("Distance_from_CUSAT_km"),
+        "price": floats("Estimated_Monthly_Rent"),
+        "rating": floats("Rating"),
+        "safetyScore": floats("Safety_Score"),
+        "matchScore": scores,
+        "address": addresses,
+        "topMatches": top_matches,
+    }
+    return [dict(zip(fields, row)) for row in zip(*fields.values())]
+
+
+def build_response(prefs: dict, results_df) -> dict:
+    """RecommendResponse-shaped payload; cached and shared, so never mutate it."""
+    if results_df.empty:
+        return {"understood": NO_MATCH_MESSAGE, "results": [], "preferences": prefs}
+    return {
+        "understood": build_understood(prefs),
+        "results": serialize_results(results_df),
+        "preferences": prefs,
+    }
+
+
+def encode_json(content) -> bytes:
+    """Compact UTF-8 JSON, with orjson when installed."""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response encoded with orjson when installed, else the stdlib encoder."""
+
+    def render(self, content) -> bytes:
+        with metrics.timer("api.encode"):
+            return encode_json(content)
+
+
+# ── Serving: dedicated scoring threads, admission limit, coalescing ───────────
+# Job key, e.g. ("score", model version, cache key) -> future of its result.
+# Only touched from the event loop, so it needs no lock.
+inflight: dict = {}
+
+
+def score_request(recommender: HostelRecommender, prefs: dict, k: int, version: str, key: str):
+    """CPU-bound part of /recommend; runs on the app's scoring threads."""
+    catalog = catalog_id(recommender)
+    with metrics.timer("api.score"):
+        # Page one through the index; the full ranking waits for /recommend/next
+        shortlist, total = recommender.shortlist(prefs, k)
+        try:
+            results_df = recommender.page(shortlist, 0, k)
+        except ValueError:  # an admin update landed in between; score once more
+            catalog = catalog_id(recommender)
+            shortlist, total = recommender.shortlist(prefs, k)
+            results_df = recommender.page(shortlist, 0, k)
+    with metrics.timer("api.serialize"):
+        response = build_response(prefs, results_df)
+
+    response["cursor"] = encode_cursor(catalog, key, k, k, prefs) if total > k else None
+    response["total"] = total
+    response_cache.put(key, response, version)
+    return response
+
+
+def score_batch(recommender: HostelRecommender, all_prefs: List[dict], k: int, version: str,
+                keys: List[str]):
+    """CPU-bound part of /recommend/batch: one vectorized pass over the cache misses."""
+    with metrics.timer("api.score_batch"):
+        results = recommender.recommend_many([prefs.copy() for prefs in all_prefs], k=k)
+    responses = []
+    with metrics.timer("api.serialize_batch"):
+        for prefs, key, results_df in zip(all_prefs, keys, results):
+            response = build_response(prefs, results_df)
+            response_cache.put(key, response, version)
+            responses.append(response)
+    return responses
+
+
+async def run_admitted(job: tuple, fn, *args, admit: bool = True):
+    """
+    Run fn(*args) on the scoring threads as `job`: identical in-flight jobs share
+    one computation, and a new one is rejected with a 429 when saturated.
+    admit=False skips the limit (but still counts) for follow-up work of an
+    already admitted request, such as the rows of a running stream.
+    """
+    future = inflight.get(job)
+    if future is None:
+        if admit and len(inflight) >= MODEL_WORKERS + MAX_QUEUE:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many recommendation requests in progress, try again shortly",
+                headers={"Retry-After": "1"},
+            )
+        future = asyncio.get_running_loop().run_in_executor(app.state.model_executor, fn, *args)
+        inflight[job] = future
+        future.add_done_callback(lambda _: inflight.pop(job, None))
+    # Shielded so a disconnecting client does not cancel the work others wait on
+    return await asyncio.shield(future)
+
+
+def prepare_query(req: RecommendRequest, recommender: HostelRecommender,
+                  extractor: EnhancedPreferenceExtractor):
+    """
+    Shared start of /recommend and /recommend/stream.
+
+    Returns (prefs, k, version, key, response); response is the session's or
+    the cache's earlier answer, or None when the query still has to be scored.
+    """
+    # 1. Extract structured preferences from natural language; in a chat
+    #    session only the stated constraints are merged over earlier turns
+    with metrics.timer("api.extract"):
+        if req.sessionId:
+            delta, warnings = extractor.extract_delta(req.text)
+            prefs = sessions.merge(req.sessionId, delta, extractor.default_prefs)
+        else:
+            prefs, warnings = extractor.extract_and_validate(req.text)
+
+    # 2. Serve unchanged sessions and repeated preference vectors without re-scoring
+    k = clamp_k(req.k)
+    version = model_version(recommender)
+    response_cache.sync_version(version)
+    key = cache_key(prefs, k)
+    response = sessions.last_response(req.sessionId, (version, key)) if req.sessionId else None
+    if response is None:
+        response = response_cache.get(key)
+    return prefs, k, version, key, response
+
+
+# ── Streaming: progressive /recommend results ─────────────────────────────────
+def stream_event(name: str, payload: dict, sse: bool) -> bytes:
+    """One event as an SSE frame or an NDJSON line ({"event": name, ...})."""
+    if sse:
+        return b"event: " + name.encode() + b"\ndata: " + encode_json(payload) + b"\n\n"
+    return encode_json({"event": name, **payload}) + b"\n"
+
+
+async def stream_recommendations(req: RecommendRequest, recommender: HostelRecommender, prefs: dict,
+                                 k: int, version: str, key: str, response: Optional[dict],
+                                 scored: Optional[tuple], sse: bool):
+    """
+    Events of /recommend/stream: "understood", one "result" per hostel, "done".
+
+    scored is (shortlist, total, cursor) from the route when response is
+    None. Hostels are explained one per scoring-thread hop, so the first
+    arrives after one explanation instead of k. When the client goes away
+    Starlette cancels or closes this generator, and no further rows are
+    explained.
+    """
+    finished = False
+    try:
+        if response is None:
+            shortlist, total, cursor = scored
+            understood = build_understood(prefs) if total else NO_MATCH_MESSAGE
+            yield stream_event("understood", {"understood": understood, "preferences": prefs,
+                                              "cursor": cursor, "total": total}, sse)
+
+            results = []
+            for rank in range(len(shortlist)):
+                results_df = await run_admitted(("row", version, key, rank), recommender.page,
+                                                shortlist, rank, rank + 1, admit=False)
+                with metrics.timer("api.serialize"):
+                    hostel = serialize_results(results_df)[0]
+                results.append(hostel)
+                yield stream_event("result", {"rank": rank + 1, "hostel": hostel}, sse)
+
+            # Same payload /recommend would have built, so either endpoint can reuse it
+            response = {"understood": understood, "results": results, "preferences": prefs,
+                        "cursor": cursor, "total": total}
+            response_cache.put(key, response, version)
+        else:
+            yield stream_event("understood", {"understood": response["understood"],
+                                              "preferences": response["preferences"],
+                                              "cursor": response.get("cursor"),
+                                              "total": response.get("total")}, sse)
+            for rank, hostel in enumerate(response["results"], 1):
+                yield stream_event("result", {"rank": rank, "hostel": hostel}, sse)
+
+        if req.sessionId:
+            sessions.remember(req.sessionId, (version, key), response)
+        finished = True
+        yield stream_event("done", {"count": len(response["results"])}, sse)
+
+    except Exception as exc:
+        # Headers are already sent, so report the failure in-band
+        traceback.print_exc()
+        metrics.inc("ml_errors_total", "Unhandled errors by endpoint", endpoint="/recommend/stream",
+                    error=type(exc).__name__)
+        finished = True
+        yield stream_event("error", {"detail": str(exc)}, sse)
+    finally:
+        if not finished:
+            metrics.inc("ml_stream_disconnects_total", "Streams closed by the client before completion")
+
+
+# ── Metrics read at scrape time ───────────────────────────────────────────────
+def cache_metrics(field: str) -> dict:
+    """One counter/gauge field of every cache, labelled by cache name."""
+    values = {(("cache", "response"),): response_cache.stats()[field]}
+    if state.ready.is_set() and field in ("size", "hits", "misses", "evictions"):
+        values[(("cache", "extraction"),)] = state.extractor.cache_stats()[field]
+    return values
+
+
+metrics.gauge("ml_ready", "1 once the model is loaded and warmed up",
+              lambda: int(state.ready.is_set()))
+metrics.gauge("ml_model_generation", "Number of times a model has been loaded",
+              lambda: state.generation)
+metrics.gauge("ml_catalog_hostels", "Hostels in the served catalog",
+              lambda: len(state.recommender.df_processed) if state.ready.is_set() else None)
+metrics.gauge("ml_catalog_version", "Catalog version (bumped by admin updates)",
+              lambda: state.recommender.catalog_version if state.ready.is_set() else None)
+metrics.gauge("ml_cache_entries", "Entries held per cache", lambda: cache_metrics("size"))
+metrics.gauge("ml_cache_hits_total", "Cache hits per cache",
+              lambda: cache_metrics("hits"), kind="counter")
+metrics.gauge("ml_cache_misses_total", "Cache misses per cache",
+              lambda: cache_metrics("misses"), kind="counter")
+metrics.gauge("ml_cache_evictions_total", "Cache evictions per cache",
+              lambda: cache_metrics("evictions"), kind="counter")
+metrics.gauge("ml_sessions", "Chat sessions being tracked", lambda: sessions.stats()["size"])
+metrics.gauge("ml_ranking_bytes", "Memory held by cached rankings for cursors",
+              lambda: rankings.stats()["bytes"])
+metrics.gauge("ml_inflight_queries", "Distinct scoring jobs running or queued",
+              lambda: len(inflight))
 
 
 # ── Routes ────────────────────────────────────────────────────────────────────
@@ -73,68 +930,202 @@ def health():
     return {"ok": True, "message": "ML API is running"}
 
 
+@app.get("/cache/stats")
+def cache_stats():
+    stats = response_cache.stats()
+    if state.ready.is_set():
+        stats["extraction"] = state.extractor.cache_stats()
+    stats["sessions"] = sessions.stats()
+    stats["rankings"] = rankings.stats()
+    return stats
+
+
+@app.get("/metrics")
+def metrics_endpoint():
+    if not metrics.ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled (ML_METRICS=0)")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/ready")
+def ready():
+    body = {"ready": state.ready.is_set(), "status": state.status}
+    if state.ready.is_set():
+        body["hostels"] = len(state.recommender.df_processed)
+        body["loadedAt"] = state.loaded_at
+        if state.artifact_version:
+            body["artifactVersion"] = state.artifact_version
+        return body
+    if state.error:
+        body["error"] = state.error
+    return JSONResponse(status_code=503, content=body)
+
+
 @app.post("/recommend", response_model=RecommendResponse)
-def recommend(req: RecommendRequest):
+async def recommend(req: RecommendRequest):
+    recommender, extractor = await require_model_async()
     try:
-        # 1. Extract structured preferences from natural language
-        prefs, warnings = extractor.extract_and_validate(req.text)
-
-        # 2. Run KNN recommender
-        k = max(1, min(req.k or 5, 10))
-        results_df = recommender.recommend(prefs.copy(), k=k, show_details=False)
-
-        if results_df.empty:
-            return RecommendResponse(
-                understood="I couldn't find hostels matching those criteria. Try relaxing your filters.",
-                results=[],
-                preferences=prefs,
-            )
+        # 1-2. Extract preferences; reuse the session's or cache's earlier answer
+        prefs, k, version, key, response = prepare_query(req, recommender, extractor)
 
-        # 3. Build human-readable "understood" summary
-        parts = []
-        if prefs.get("hostel_type"):
-            parts.append(f"type: **{prefs['hostel_type']}**")
-        if prefs.get("Distance_from_CUSAT_km"):
-            parts.append(f"within **{prefs['Distance_from_CUSAT_km']} km**")
-        if prefs.get("Estimated_Monthly_Rent"):
-            val = int(prefs["Estimated_Monthly_Rent"])
-            parts.append(f"budget **₹{val:,}**")
-        if prefs.get("Safety_Score"):
-            parts.append(f"safety **{prefs['Safety_Score']}+**")
-
-        understood = (
-            f"I understood: {', '.join(parts)}. Here are my top picks:"
-            if parts
-            else "Here are some top-rated hostels for you:"
-        )
+        if response is None:
+            # 3. Run KNN recommender and build the response on a scoring thread
+            response = await run_admitted(("score", version, key), score_request,
+                                          recommender, prefs, k, version, key)
 
-        # 4. Serialize results
-        hostel_list = []
-        for _, row in results_df.iterrows():
-            # match_score is 0-1 from the model; convert to 0-100 %
-            raw_score = float(row.get("match_score", 0.5))
-            pct = round(raw_score * 100)
-
-            explanation = row.get("explanation", {})
-            top_matches = explanation.get("top_matches", []) if isinstance(explanation, dict) else []
-
-            hostel_list.append(
-                HostelResult(
-                    id=int(row.get("ID", 0)) if row.get("ID") else None,
-                    name=str(row.get("Name", "Unknown")),
-                    hostelType=str(row.get("Hostel_Type", "")).strip() or None,
-                    distance=float(row["Distance_from_CUSAT_km"]) if row.get("Distance_from_CUSAT_km") is not None else None,
-                    price=float(row["Estimated_Monthly_Rent"]) if row.get("Estimated_Monthly_Rent") is not None else None,
-                    rating=float(row["Rating"]) if row.get("Rating") is not None else None,
-                    safetyScore=float(row["Safety_Score"]) if row.get("Safety_Score") is not None else None,
-                    matchScore=pct,
-                    address=str(row.get("Address", "")) or None,
-                    topMatches=top_matches,
-                )
-            )
+        if req.sessionId:
+            sessions.remember(req.sessionId, (version, key), response)
+        # The payload already matches RecommendResponse; skip re-validation
+        return FastJSONResponse(response)
+
+    except HTTPException:
+        raise
+    except Exception as exc:
+        traceback.print_exc()
+        metrics.inc("ml_errors_total", "Unhandled errors by endpoint", endpoint="/recommend",
+                    error=type(exc).__name__)
+        raise HTTPException(status_code=500, detail=str(exc))
+
+
+@app.post("/recommend/stream")
+async def recommend_stream(req: RecommendRequest, accept: Optional[str] = Header(None)):
+    recommender, extractor = await require_model_async()
+    try:
+        prefs, k, version, key, response = prepare_query(req, recommender, extractor)
+        # Find the hostels before any bytes go out, so a saturated server still answers 429
+        scored = None
+        if response is None:
+            catalog = catalog_id(recommender)
+            shortlist, total = await run_admitted(("shortlist", version, key), recommender.shortlist,
+                                                  prefs, k)
+            scored = (shortlist, total, encode_cursor(catalog, key, k, k, prefs) if total > k else None)
+    except HTTPException:
+        raise
+    except Exception as exc:
+        traceback.print_exc()
+        metrics.inc("ml_errors_total", "Unhandled errors by endpoint", endpoint="/recommend/stream",
+                    error=type(exc).__name__)
+        raise HTTPException(status_code=500, detail=str(exc))
 
-        return RecommendResponse(understood=understood, results=hostel_list, preferences=prefs)
+    # Server-Sent Events for EventSource-style clients, NDJSON otherwise
+    sse = "text/event-stream" in (accept or "")
+    return StreamingResponse(
+        stream_recommendations(req, recommender, prefs, k, version, key, response, scored, sse),
+        media_type="text/event-stream" if sse else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
+
+@app.post("/recommend/next", response_model=RecommendPage)
+async def recommend_next(req: NextPageRequest):
+    recommender, _ = await require_model_async()
+    version, key, offset, page_k, prefs = decode_cursor(req.cursor)
+    k = clamp_k(req.k or page_k)
+
+    # Rankings hold row positions, so they only apply to the catalog they came from
+    if version != catalog_id(recommender):
+        raise HTTPException(status_code=410, detail="Cursor expired, submit the query again")
+    try:
+        try:
+            ranking = rankings.get((version, key))
+            if ranking is None:
+                # First page past the shortlist, evicted, or ranked by another worker
+                ranking = await run_admitted(("rank", version, key), recommender.rank, prefs)
+                rankings.put((version, key), ranking)
+            results_df = await run_admitted(("page", version, key, offset, k), recommender.page,
+                                            ranking, offset, offset + k)
+        except ValueError:
+            raise HTTPException(status_code=410, detail="Cursor expired, submit the query again")
+
+        with metrics.timer("api.serialize"):
+            results = serialize_results(results_df)
+        cursor = (encode_cursor(version, key, offset + k, k, prefs)
+                  if offset + k < len(ranking) else None)
+        return FastJSONResponse({"results": results, "cursor": cursor, "total": len(ranking)})
+
+    except HTTPException:
+        raise
     except Exception as exc:
         traceback.print_exc()
+        metrics.inc("ml_errors_total", "Unhandled errors by endpoint", endpoint="/recommend/next",
+                    error=type(exc).__name__)
         raise HTTPException(status_code=500, detail=str(exc))
+
+
+@app.post("/recommend/batch", response_model=BatchRecommendResponse)
+async def recommend_batch(req: BatchRecommendRequest):
+    recommender, extractor = await require_model_async()
+    try:
+        # 1. Extract preferences for every text
+        with metrics.timer("api.extract_batch"):
+            all_prefs = [extractor.extract_and_validate(text)[0] for text in req.texts]
+
+        # 2. Look every query up in the response cache
+        k = clamp_k(req.k)
+        version = model_version(recommender)
+        response_cache.sync_version(version)
+        keys = [cache_key(prefs, k) for prefs in all_prefs]
+        responses = [response_cache.get(key) for key in keys]
+        missing = [i for i, response in enumerate(responses) if response is None]
+
+        # 3. Score the misses against the catalog in one vectorized pass
+        if missing:
+            missing_keys = [keys[i] for i in missing]
+            scored = await run_admitted(("batch", version, tuple(missing_keys)), score_batch,
+                                        recommender, [all_prefs[i] for i in missing], k, version,
+                                        missing_keys)
+            for i, response in zip(missing, scored):
+                responses[i] = response
+
+        return FastJSONResponse({"results": responses})
+
+    except HTTPException:
+        raise
+    except Exception as exc:
+        traceback.print_exc()
+        metrics.inc("ml_errors_total", "Unhandled errors by endpoint", endpoint="/recommend/batch",
+                    error=type(exc).__name__)
+        raise HTTPException(status_code=500, detail=str(exc))
+
+
+@app.put("/admin/hostels/{hostel_id}", dependencies=[Depends(require_admin)])
+def admin_upsert_hostel(hostel_id: str, body: HostelUpsert, background_tasks: BackgroundTasks):
+    record = body.model_dump(exclude_unset=True)
+    try:
+        recommender, inserted = update_catalog(lambda r: r.upsert_hostel(hostel_id, record))
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+
+    # Shared mode already published the update to the artifact store
+    if PERSIST_UPDATES and store is None:
+        background_tasks.add_task(persist_catalog, recommender)
+    return {
+        "ok": True,
+        "inserted": inserted,
+        "catalogVersion": recommender.catalog_version,
+        "hostels": len(recommender.df_processed),
+    }
+
+
+@app.delete("/admin/hostels/{hostel_id}", dependencies=[Depends(require_admin)])
+def admin_delete_hostel(hostel_id: str, background_tasks: BackgroundTasks):
+    def delete(recommender: HostelRecommender):
+        if not recommender.delete_hostel(hostel_id):
+            raise HTTPException(status_code=404, detail=f"Hostel {hostel_id} not found")
+
+    recommender, _ = update_catalog(delete)
+
+    if PERSIST_UPDATES and store is None:
+        background_tasks.add_task(persist_catalog, recommender)
+    return {
+        "ok": True,
+        "catalogVersion": recommender.catalog_version,
+        "hostels": len(recommender.df_processed),
+    }
+
+
+@app.delete("/sessions/{session_id}")
+def delete_session(session_id: str):
+    if not sessions.drop(session_id):
+        raise HTTPException(status_code=404, detail=f"Session {session_id} not found")
+    return {"ok": True}
@@ -0,0 +1,202 @@
+"""
+Lightweight metrics for the Havenly ML service
+==============================================
+Stage timers, counters and callback gauges rendered in the Prometheus text
+exposition format, without a prometheus_client dependency.
+
+Usage:
+    import metrics
+
+    with metrics.timer('recommender.knn'):
+        ...
+    metrics.inc('ml_errors_total', 'Unhandled errors', endpoint='/recommend')
+    metrics.gauge('ml_catalog_hostels', 'Hostels in the catalog', lambda: 114)
+    text = metrics.render()
+
+Set ML_METRICS=0 to disable collection: timer() then hands out one shared
+no-op context manager and inc() returns immediately, so instrumented code
+pays only a function call.
+"""
+
+import bisect
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+ENABLED = os.environ.get("ML_METRICS", "1") != "0"
+
+# Latency buckets in seconds, 50 us to 5 s
+BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+           0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+STAGE_METRIC = 'ml_stage_seconds'
+_NULL_TIMER = nullcontext()
+
+
+class Histogram:
+    """Cumulative-bucket histogram of observed values (seconds)."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        slot = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[slot] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.sum, self.count
+
+
+class _Timer:
+    """Context manager that observes its elapsed time into a histogram."""
+
+    __slots__ = ('histogram', 'started')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started)
+        return False
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in labels
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Registry:
+    """Holds every metric of the process and renders them as Prometheus text."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help = {}                 # metric name -> (type, help)
+        self._histograms = {}           # (name, labels) -> Histogram
+        self._stages = {}               # stage -> Histogram (fast path for timer())
+        self._counters = {}             # (name, labels) -> value
+        self._gauges = {}               # name -> callback
+
+    def _declare(self, name, kind, help_text):
+        if name not in self._help:
+            self._help[name] = (kind, help_text)
+
+    def histogram(self, name, help_text, **labels):
+        """Get or create the histogram for name + labels"""
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                self._declare(name, 'histogram', help_text)
+                histogram = self._histograms.setdefault(key, Histogram())
+        return histogram
+
+    def timer(self, stage):
+        """Time a block into ml_stage_seconds{stage=...}; a no-op when disabled"""
+        if not ENABLED:
+            return _NULL_TIMER
+        histogram = self._stages.get(stage)
+        if histogram is None:
+            histogram = self.histogram(STAGE_METRIC, 'Time spent per processing stage', stage=stage)
+            self._stages[stage] = histogram
+        return _Timer(histogram)
+
+    def observe(self, name, help_text, value, **labels):
+        if ENABLED:
+            self.histogram(name, help_text, **labels).observe(value)
+
+    def inc(self, name, help_text, amount=1, **labels):
+        """Increase a counter (name should end in _total)"""
+        if not ENABLED:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._declare(name, 'counter', help_text)
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def gauge(self, name, help_text, callback, kind='gauge'):
+        """
+        Register a value read at scrape time.
+
+        callback returns a number, or a dict mapping label tuples such as
+        (('cache', 'response'),) to numbers; None skips the metric.
+        kind='counter' marks monotonically increasing values.
+        """
+        with self._lock:
+            self._help[name] = (kind, help_text)
+            self._gauges[name] = callback
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format (version 0.0.4)"""
+        with self._lock:
+            help_entries = dict(self._help)
+            histograms = list(self._histograms.items())
+            counters = list(self._counters.items())
+            gauges = list(self._gauges.items())
+
+        samples = {}  # name -> list of lines
+        for (name, labels), histogram in histograms:
+            counts, total, count = histogram.snapshot()
+            lines = samples.setdefault(name, [])
+            cumulative = 0
+            for bound, bucket_count in zip(histogram.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                bucket_labels = labels + (('le', _format_value(bound)),)
+                lines.append(f'{name}_bucket{_format_labels(bucket_labels)} {cumulative}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(total)}')
+            lines.append(f'{name}_count{_format_labels(labels)} {count}')
+
+        for (name, labels), value in counters:
+            samples.setdefault(name, []).append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+
+        for name, callback in gauges:
+            try:
+                value = callback()
+            except Exception:
+                continue
+            if value is None:
+                continue
+            values = value.items() if isinstance(value, dict) else [((), value)]
+            samples.setdefault(name, []).extend(
+                f'{name}{_format_labels(labels)} {_format_value(v)}' for labels, v in values
+            )
+
+        out = []
+        for name in sorted(samples):
+            kind, help_text = help_entries[name]
+            out.append(f'# HELP {name} {help_text}')
+            out.append(f'# TYPE {name} {kind}')
+            out.extend(samples[name])
+        return '\n'.join(out) + '\n'
+
+
+registry = Registry()
+
+timer = registry.timer
+observe = registry.observe
+inc = registry.inc
+gauge = registry.gauge
+render = registry.render